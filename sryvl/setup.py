@@ -3,5 +3,6 @@ from setuptools import setup
 setup(
     name='sryvl',
     version='0.0.1',
-    install_requires=['gym']
+    install_requires=['gym'],
+    extras_require={'jit': ['numba']},
 )
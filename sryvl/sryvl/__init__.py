@@ -1,5 +1,7 @@
 from gym.envs.registration import register
 from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.vec_env import SrYvlVecEnv
+from sryvl.envs.sryvl_v0.multi_env import SrYvlMultiAgentEnv
 
 register(
     id='sryvl-v0',
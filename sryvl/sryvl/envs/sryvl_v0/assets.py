@@ -1,4 +1,6 @@
+from functools import lru_cache
 import numpy as np
+from sryvl.envs.sryvl_v0.jit import NUMBA_ENABLED, paint_tiles
 
 PETAL_GOOD = [100, 200, 255]
 PETAL_BAD = [255, 100, 100]
@@ -283,11 +285,200 @@ def build_cell(
     return cell
 
 
+# Tile atlas. A window cell is drawn as one of:
+# - a scenery tile: no plant, or a plant/poison of one of 4 sizes, on the plain or terrain background
+# - the boundary tile
+# - an agent tile: the scenery tile overlaid with the agent, its inventory flags and its skin colour
+# The skin colour depends on the energy level, which is quantized into the levels of energy_levels(): ENERGY_LEVELS
+# evenly spaced over [0, MAX_ENERGY], plus the levels where the colour jumps.
+N_CONTENTS = 1 + len(plants) + len(poisons)
+N_SCENERY_TILES = N_CONTENTS * 2
+BOUNDARY_TILE = N_SCENERY_TILES
+N_INVENTORY_FLAGS = 4
+MAX_ENERGY = 2.0
+ENERGY_LEVELS = 65
+
+
+def _cell_content(content_id, with_agent, plant_inventory, poison_inventory):
+    """Pixels of a cell. content_id: 0 = nothing, 1-4 = plant sizes, 5-8 = poison sizes."""
+    if content_id == 0:
+        content = []
+    elif content_id <= len(plants):
+        content = plants[content_id - 1]
+    else:
+        content = poisons[content_id - 1 - len(plants)]
+
+    if not with_agent:
+        return list(content)
+
+    if content:
+        plant_offset = [[x[0], x[1] + 1, x[2]] for x in content]
+        agent_offset = [[x[0], x[1] - 2, x[2]] for x in agent]
+        content = plant_offset + agent_offset
+        if plant_inventory > 0:
+            content.append([4, 0, PETAL_GOOD])
+        if poison_inventory > 0:
+            content.append([6, 0, PETAL_BAD])
+    else:
+        content = list(agent)
+        if plant_inventory > 0:
+            content += plant_in_hand
+        if poison_inventory > 0:
+            content += poison_in_hand
+    return content
+
+
+def _paint(content, terrain_background):
+    """(3, 9, 9) tile and the mask of its skin pixels."""
+    cell = np.full((3, 9, 9), TERRAIN if terrain_background else 255, dtype=np.uint8)
+    skin = np.zeros((9, 9), dtype=bool)
+    for y, x, color in content:
+        cell[:, y, x] = color
+        skin[y, x] = color == SKIN
+    return cell, skin
+
+
+@lru_cache(maxsize=None)
+def energy_levels(jumper_threshold: float):
+    """
+    Energy level of each skin colour of the atlas, sorted, and the mask of the levels where the colour jumps:
+    1 and jumper_threshold. A level is added between two jumps that have no other level between them.
+    """
+    jumps = np.array(sorted({1.0, float(jumper_threshold)}))
+    jumps = jumps[(jumps > 0) & (jumps < MAX_ENERGY)]
+    levels = np.union1d(np.linspace(0, MAX_ENERGY, ENERGY_LEVELS), jumps)
+    gaps = np.isin(levels[:-1], jumps) & np.isin(levels[1:], jumps)
+    levels = np.union1d(levels, (levels[:-1][gaps] + levels[1:][gaps]) / 2)
+    return levels, np.isin(levels, jumps)
+
+
+def energy_bins(energy_level, jumper_threshold: float):
+    """
+    Index in energy_levels() of the skin colour of each energy level: the nearest level on the same side of
+    every jump. The jump levels only take their exact value, so the skin never shows an agent able to jump
+    when it is not, or the reverse.
+    """
+    levels, jumps = energy_levels(float(jumper_threshold))
+    energy = np.clip(np.asarray(energy_level, dtype=float), 0, MAX_ENERGY)
+    hi = np.searchsorted(levels, energy)  # levels[hi - 1] < energy <= levels[hi]
+    lo = np.maximum(hi - 1, 0)
+    nearer_hi = levels[hi] - energy <= energy - levels[lo]
+    use_hi = (levels[hi] == energy) | jumps[lo] | (~jumps[hi] & nearer_hi)
+    return np.where(use_hi, hi, lo)
+
+
+@lru_cache(maxsize=None)
+def tile_atlas(jumper_threshold: float):
+    """
+    All distinct 9x9 tiles for the given jumper threshold: (n_tiles, 3, 9, 9) uint8.
+    Index with tile_indices(). Distance shading is applied after the gather.
+    """
+    scenery = [_paint(_cell_content(c, False, 0, 0), b)[0] for c in range(N_CONTENTS) for b in (0, 1)]
+    boundary = np.full((1, 3, 9, 9), BOUNDARY, dtype=np.uint8)
+
+    bases, skins = zip(
+        *[
+            _paint(_cell_content(c, True, inventory >> 1, inventory & 1), b)
+            for c in range(N_CONTENTS)
+            for inventory in range(N_INVENTORY_FLAGS)
+            for b in (0, 1)
+        ]
+    )
+    levels, _ = energy_levels(jumper_threshold)
+    skin_colors = np.array(
+        [
+            [
+                skin_color_r(level),
+                skin_color_g(level, jumper_threshold),
+                skin_color_b(level, jumper_threshold),
+            ]
+            for level in levels
+        ]
+    )
+    skin_colors = np.clip(skin_colors, 0, 255).astype(np.uint8)
+    agents = np.where(
+        np.array(skins)[:, None, None],
+        skin_colors[None, :, :, None, None],
+        np.array(bases)[:, None],
+    )
+
+    atlas = np.concatenate([np.array(scenery), boundary, agents.reshape(-1, 3, 9, 9)])
+    atlas.flags.writeable = False
+    return atlas
+
+
+# Built at import for the default size_threshold_to_jump of SrYvlLvl0Env.
+tile_atlas(1.0)
+
+
+def tile_indices(windows, plant_inventory, poison_inventory, jumper_threshold: float):
+    """Atlas index of every cell of a batch of (n, 7, size, size) observation windows."""
+    boundary = windows[:, 0] > 0
+    terrain = (windows[:, 1] > 0).astype(np.int64)
+    plant_age = windows[:, 2]
+    poison_age = windows[:, 3]
+    health = windows[:, 4]
+
+    # Index of the size of the plant. (binning)
+    plant_size = np.minimum((plant_age * len(plants)).astype(np.int64), len(plants) - 1)
+    poison_size = np.minimum((poison_age * len(poisons)).astype(np.int64), len(poisons) - 1)
+    content = np.where(plant_age > 0, 1 + plant_size, np.where(poison_age > 0, 1 + len(plants) + poison_size, 0))
+
+    scenery = content * 2 + terrain
+    inventory = (np.asarray(plant_inventory) > 0) * 2 + (np.asarray(poison_inventory) > 0)
+    # The inventory is the observer's, at the center of the window. Other agents are drawn empty handed.
+    inventory = np.reshape(inventory, (-1, 1, 1)) * _center_mask(windows.shape[-1])
+    n_levels = len(energy_levels(float(jumper_threshold))[0])
+    agent_tiles = N_SCENERY_TILES + 1 + ((content * N_INVENTORY_FLAGS + inventory) * 2 + terrain) * n_levels
+    agent_tiles += energy_bins(health, jumper_threshold)
+
+    return np.where(boundary, BOUNDARY_TILE, np.where(health > 0, agent_tiles, scenery))
+
+
+def _center_mask(size):
+    mask = np.zeros((size, size), dtype=bool)
+    mask[size // 2, size // 2] = True
+    return mask
+
+
+def make_obs_batch(
+    windows,
+    plant_inventory,
+    poison_inventory,
+    jumper_threshold: float,
+    out=None,
+):
+    """
+    Render a batch of (n, 7, size, size) observation windows (see make_obs) into (n, 3, size * 9, size * 9) images.
+    out: optional preallocated uint8 buffer of that shape.
+    """
+    n, _, size, _ = windows.shape
+    if out is None:
+        out = np.empty((n, 3, size * 9, size * 9), dtype=np.uint8)
+
+    atlas = tile_atlas(float(jumper_threshold))
+    tiles = tile_indices(windows, plant_inventory, poison_inventory, jumper_threshold)
+    shade = np.clip((windows[:, 5] * 50).astype(np.int64), 0, 255).astype(np.uint8)
+    if NUMBA_ENABLED:
+        return paint_tiles(atlas, tiles, shade, out)
+
+    # (n, size, size, 3, 9, 9) -> (n, 3, size, 9, size, 9)
+    cells = out.reshape(n, 3, size, 9, size, 9)
+    np.copyto(cells, atlas[tiles].transpose(0, 3, 1, 4, 2, 5))
+
+    # Saturating subtraction of the distance shading: max(c, s) - s == max(c - s, 0)
+    shade = shade[:, None, :, None, :, None]
+    np.maximum(cells, shade, out=cells)
+    np.subtract(cells, shade, out=cells)
+    return out
+
+
 def make_obs(
     window,
     plant_inventory: int,
     poison_inventory: int,
     jumper_threshold: float,
+    out=None,
 ):
     """
     planes:
@@ -299,63 +490,90 @@ def make_obs(
     6: Dist b/w center of the map to each point
     7: Previous path of the player health
     """
-    img = np.zeros((3, 7 * 9, 7 * 9), dtype=np.uint8)
-    for i in range(7):
-        for j in range(7):
-            (
-                boundary,
-                terrain,
-                plant_age,
-                poison_age,
-                health,
-                distance,
-                _,
-            ) = window[:, i, j]
-
-            content = []
-            if plant_age > 0 and health > 0:
-                plant_content = plants[int(plant_age * len(plants))]
-                plant_offset = [[x[0], x[1] + 1, x[2]] for x in plant_content]
-                agent_offset = [[x[0], x[1] - 2, x[2]] for x in agent]
-                content = plant_offset + agent_offset
-                if plant_inventory > 0:
-                    content.append([4, 0, PETAL_GOOD])
-                if poison_inventory > 0:
-                    content.append([6, 0, PETAL_BAD])
-            elif poison_age > 0 and health > 0:
-                plant_content = poisons[int(poison_age * len(poisons))]
-                plant_offset = [[x[0], x[1] + 1, x[2]] for x in plant_content]
-                agent_offset = [[x[0], x[1] - 2, x[2]] for x in agent]
-                content = plant_offset + agent_offset
-                if plant_inventory > 0:
-                    content.append([4, 0, PETAL_GOOD])
-                if poison_inventory > 0:
-                    content.append([6, 0, PETAL_BAD])
-            elif plant_age > 0:
-                # Index of the size of the plant. (binning)
-                plant_size_category = int(plant_age * len(plants))
-                content = plants[plant_size_category]
-            elif poison_age > 0:
-                # Index of the size of the plant. (binning)
-                plant_size_category = int(poison_age * len(poisons))
-                content = poisons[plant_size_category]
-            elif health > 0:
-                content = list(agent)
-                if plant_inventory > 0:
-                    content += plant_in_hand
-                if poison_inventory > 0:
-                    content += poison_in_hand
-
-            cell = build_cell(
-                content,
-                energy_level=health,
-                jumper_threshold=jumper_threshold,
-                distance_from_center=distance,
-                terrain_background=terrain > 0,
-                is_boundary=boundary > 0,
-            )
-            img[:, i * 9 : (i + 1) * 9, j * 9 : (j + 1) * 9] = cell
-    return img
+    size = window.shape[-1]
+    if out is None:
+        out = np.empty((3, size * 9, size * 9), dtype=np.uint8)
+    make_obs_batch(window[None], plant_inventory, poison_inventory, jumper_threshold, out=out[None])
+    return out
+
+
+PLANE_DTYPES = (np.float64, np.float32, np.float16, np.uint8)
+
+
+def plane_scales(max_agent_size, history_length):
+    """Largest value of each plane (see make_obs). uint8 planes are quantized over [0, scale]."""
+    return np.array([1.0, 1.0, 1.0, 1.0, max_agent_size, 1.0, max_agent_size * history_length])
+
+
+def flatten_planes(planes, dtype=np.float64, scales=None, out=None):
+    """
+    Flatten (..., 7, size, size) observation planes into (..., 7 * size * size) of the given dtype.
+    uint8 quantizes each plane as round(value / scale * 255), clipped to [0, 255].
+    out: optional preallocated buffer of that shape and dtype.
+    """
+    dtype = np.dtype(dtype)
+    shape = planes.shape[:-3] + (int(np.prod(planes.shape[-3:])),)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    assert out.dtype == dtype, f"out has dtype {out.dtype}, not {dtype}"
+    target = out.reshape(planes.shape)
+
+    if dtype == np.uint8:
+        quantized = planes * (255 / scales)[:, None, None]
+        np.rint(quantized, out=quantized)
+        np.clip(quantized, 0, 255, out=quantized)
+        np.copyto(target, quantized, casting="unsafe")
+    else:
+        np.copyto(target, planes, casting="same_kind")
+    return out
+
+
+# Channels of the symbolic observations: the planes (see make_obs) quantized to uint8, then the inventory flags.
+SYMBOLIC_CHANNELS = (
+    "boundary",
+    "terrain",
+    "food_age",
+    "poison_age",
+    "health",
+    "distance",
+    "history",
+    "plant_in_hand",
+    "poison_in_hand",
+)
+
+
+def make_symbolic_batch(windows, plant_inventory, poison_inventory, scales, cell_pixels=1, out=None):
+    """
+    Render a batch of (n, 7, size, size) observation windows into (n, 9, size * k, size * k) uint8 images
+    with one k x k block of pixels per cell (k = cell_pixels) and one channel per SYMBOLIC_CHANNELS.
+    The planes are quantized as in flatten_planes. The inventory flags are 255 on the observing agent's cell,
+    the center of the window.
+    out: optional preallocated uint8 buffer of that shape.
+    """
+    n, n_planes, size, _ = windows.shape
+    k = cell_pixels
+    if out is None:
+        out = np.empty((n, len(SYMBOLIC_CHANNELS), size * k, size * k), dtype=np.uint8)
+
+    channels = np.empty((n, len(SYMBOLIC_CHANNELS), size, size), dtype=np.uint8)
+    flatten_planes(windows, np.uint8, scales, out=channels[:, :n_planes].reshape(n, -1))
+    agent = (windows[:, 4] > 0) & _center_mask(size)
+    hand = np.stack([np.asarray(plant_inventory) > 0, np.asarray(poison_inventory) > 0], axis=-1).reshape(n, 2, 1, 1)
+    np.multiply(agent[:, None] & hand, 255, out=channels[:, n_planes:], casting="unsafe")
+
+    # (n, c, size, size) -> (n, c, size, k, size, k)
+    cells = out.reshape(n, len(SYMBOLIC_CHANNELS), size, k, size, k)
+    np.copyto(cells, channels[:, :, :, None, :, None])
+    return out
+
+
+def make_symbolic(window, plant_inventory: int, poison_inventory: int, scales, cell_pixels=1, out=None):
+    """One (7, size, size) observation window, see make_symbolic_batch."""
+    size = window.shape[-1]
+    if out is None:
+        out = np.empty((len(SYMBOLIC_CHANNELS), size * cell_pixels, size * cell_pixels), dtype=np.uint8)
+    make_symbolic_batch(window[None], plant_inventory, poison_inventory, scales, cell_pixels, out=out[None])
+    return out
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""
+Throughput benchmark of SrYvlLvl0Env, written as JSON so that runs can be diffed between commits.
+
+For every combination of world_size, initial_food_density and observation_radius, it measures:
+- steps_per_sec: step(observe=False) with random legal actions, the simulation alone
+- reset_ms: mean latency of reset()
+- render_ms: mean time of render() of the current state, for each render mode that returns an observation
+- peak_mb: peak memory allocated while building, resetting and stepping the env (separate run, under tracemalloc)
+
+Usage:
+    python -m sryvl.envs.sryvl_v0.benchmark results.json
+    python -m sryvl.envs.sryvl_v0.benchmark new.json --baseline results.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+
+WORLD_SIZES = (20, 100, 500)
+FOOD_DENSITIES = (0.05, 0.2)
+OBSERVATION_RADII = (3, 7)
+RENDER_MODES = ("rgb_array", "flattened_planes", "symbolic", "ansi")
+
+# Higher is better for these metrics, lower for the others.
+HIGHER_IS_BETTER = ("steps_per_sec",)
+
+
+def benchmark_config(n_steps=500, n_resets=5, n_renders=50, seed=0, **params) -> dict:
+    """Metrics of one env configuration, params are keyword arguments of SrYvlLvl0Env."""
+    env = SrYvlLvl0Env(stats_level="off", **params)
+
+    reset_time = 0.0
+    for i in range(n_resets):
+        start = time.perf_counter()
+        env.reset(seed=seed + i)
+        reset_time += time.perf_counter() - start
+
+    step_time = 0.0
+    for _ in range(n_steps):
+        action = env.sample_action()
+        start = time.perf_counter()
+        env.step(action, observe=False)
+        step_time += time.perf_counter() - start
+        if env.done:
+            env.reset()
+
+    render_ms = {}
+    for mode in RENDER_MODES:
+        start = time.perf_counter()
+        for _ in range(n_renders):
+            env.render(mode)
+        render_ms[mode] = (time.perf_counter() - start) / n_renders * 1e3
+
+    return {
+        "steps_per_sec": n_steps / step_time,
+        "reset_ms": reset_time / n_resets * 1e3,
+        "render_ms": render_ms,
+        "peak_mb": peak_memory(n_steps=min(n_steps, 100), seed=seed, **params) / 2**20,
+    }
+
+
+def peak_memory(n_steps=100, seed=0, **params) -> int:
+    """Peak bytes allocated while building, resetting and stepping an env."""
+    tracemalloc.start()
+    try:
+        env = SrYvlLvl0Env(stats_level="off", **params)
+        env.reset(seed=seed)
+        for _ in range(n_steps):
+            env.step(env.sample_action(), observe=False)
+            if env.done:
+                env.reset()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(
+    world_sizes=WORLD_SIZES, food_densities=FOOD_DENSITIES, observation_radii=OBSERVATION_RADII, verbose=True, **kwargs
+) -> dict:
+    """Sweep the configurations. kwargs: passed to benchmark_config."""
+    results = []
+    for world_size, density, radius in itertools.product(world_sizes, food_densities, observation_radii):
+        params = dict(world_size=world_size, initial_food_density=density, observation_radius=radius)
+        metrics = benchmark_config(**params, **kwargs)
+        results.append({"params": params, **metrics})
+        if verbose:
+            print(f"{params}: {metrics['steps_per_sec']:.0f} steps/s, reset {metrics['reset_ms']:.2f} ms")
+    return {"meta": environment_info(), "results": results}
+
+
+def environment_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(baseline: dict, results: dict, tolerance=0.1) -> list:
+    """Metrics of results that are more than tolerance (relative) worse than in baseline, as readable lines."""
+    old = {_key(r["params"]): _flatten(r) for r in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = _key(result["params"])
+        if key not in old:
+            continue
+        for metric, value in _flatten(result).items():
+            before = old[key].get(metric)
+            if not before:
+                continue
+            change = value / before - 1
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                regressions.append(f"{result['params']} {metric}: {before:.4g} -> {value:.4g} ({change:+.0%})")
+    return regressions
+
+
+def _key(params):
+    return tuple(sorted(params.items()))
+
+
+def _flatten(result):
+    metrics = {name: value for name, value in result.items() if name not in ("params", "render_ms")}
+    metrics.update({f"render_ms.{mode}": value for mode, value in result["render_ms"].items()})
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="JSON file to write the results to")
+    parser.add_argument("--world-sizes", type=int, nargs="+", default=WORLD_SIZES)
+    parser.add_argument("--food-densities", type=float, nargs="+", default=FOOD_DENSITIES)
+    parser.add_argument("--observation-radii", type=int, nargs="+", default=OBSERVATION_RADII)
+    parser.add_argument("--n-steps", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=None, help="earlier results to compare with, exits with 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmark(
+        args.world_sizes, args.food_densities, args.observation_radii, n_steps=args.n_steps, seed=args.seed
+    )
+    with open(args.path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Saved {len(results['results'])} results to {args.path}")
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        print("\n".join(regressions) if regressions else "No regressions")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
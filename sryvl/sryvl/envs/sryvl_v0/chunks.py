@@ -0,0 +1,142 @@
+"""
+Sparse (side, side) grids for very large SrYvl worlds.
+
+A ChunkedGrid stores the grid as chunk x chunk tiles that are allocated on the first write of a value
+other than its fill, and released once all their cells are back to fill. Only the active tiles, the ones
+around foods or the agent, take memory.
+"""
+import numpy as np
+
+
+def make_grid(shape, fill, dtype, chunk_size=None):
+    """Dense grid full of fill, or a ChunkedGrid with the given chunk_size."""
+    if chunk_size is None:
+        return np.full(shape, fill, dtype=dtype)
+    return ChunkedGrid(shape, fill, dtype, chunk_size)
+
+
+class ChunkedGrid:
+    """
+    A 2D grid of lazily allocated tiles, indexed like a numpy array:
+    - grid[y, x] and grid[ys, xs] gather, and setting them scatters. Scattered cells must be unique.
+    - grid[y0:y1, x0:x1] is a dense copy of the region.
+
+    Tiles live in a pool. Pool tile 0 is never written and stays full of fill, so that unallocated
+    tiles are read through plain fancy indexing.
+    """
+
+    def __init__(self, shape, fill=0, dtype=np.float64, chunk_size=32):
+        self.shape = tuple(shape)
+        self.fill_value = fill
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        n_tiles = (-(-self.shape[0] // chunk_size), -(-self.shape[1] // chunk_size))
+        self.tiles = np.zeros(n_tiles, dtype=np.int64)
+        self.pool = np.full((1, chunk_size, chunk_size), fill, dtype=self.dtype)
+        # Number of cells of each pool tile that are not fill.
+        self.counts = np.zeros(1, dtype=np.int64)
+        self._free = []
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        dense = self[0 : self.shape[0], 0 : self.shape[1]]
+        return dense if dtype is None else dense.astype(dtype)
+
+    @property
+    def active(self):
+        """Mask of the allocated tiles."""
+        return self.tiles != 0
+
+    @property
+    def nbytes(self):
+        return self.pool.nbytes + self.tiles.nbytes
+
+    def __getitem__(self, key):
+        ys, xs = key
+        if isinstance(ys, slice) and isinstance(xs, slice):
+            ys = np.arange(*ys.indices(self.shape[0]))[:, None]
+            xs = np.arange(*xs.indices(self.shape[1]))[None, :]
+        elif _is_int(ys) and _is_int(xs):
+            c = self.chunk_size
+            return self.pool[self.tiles[ys // c, xs // c], ys % c, xs % c]
+        ys = np.asarray(ys, dtype=np.int64)
+        xs = np.asarray(xs, dtype=np.int64)
+        c = self.chunk_size
+        ty, oy = np.divmod(ys, c)
+        tx, ox = np.divmod(xs, c)
+        tiles = self.tiles.ravel().take(ty * self.tiles.shape[1] + tx)
+        return self.pool.ravel().take((tiles * c + oy) * c + ox)
+
+    def __setitem__(self, key, value):
+        ys, xs = key
+        c = self.chunk_size
+        if _is_int(ys) and _is_int(xs):
+            ty, tx, oy, ox = ys // c, xs // c, ys % c, xs % c
+            tile = self.tiles[ty, tx]
+            is_fill = value == self.fill_value
+            if tile == 0:
+                if is_fill:
+                    return
+                tile = self.tiles[ty, tx] = self._allocate(1)[0]
+            self.counts[tile] += int(not is_fill) - int(self.pool[tile, oy, ox] != self.fill_value)
+            self.pool[tile, oy, ox] = value
+            if self.counts[tile] == 0:
+                self._release(np.array([ty]), np.array([tx]))
+            return
+
+        ys, xs, values = np.broadcast_arrays(
+            np.asarray(ys, dtype=np.int64), np.asarray(xs, dtype=np.int64), np.asarray(value, dtype=self.dtype)
+        )
+        ys, xs, values = ys.ravel(), xs.ravel(), values.ravel()
+        ty, tx, oy, ox = ys // c, xs // c, ys % c, xs % c
+        not_fill = values != self.fill_value
+
+        missing = (self.tiles[ty, tx] == 0) & not_fill
+        if missing.any():
+            new = np.unique(ty[missing] * self.tiles.shape[1] + tx[missing])
+            self.tiles.flat[new] = self._allocate(len(new))
+
+        tiles = self.tiles[ty, tx]
+        write = tiles != 0
+        tiles, oy, ox = tiles[write], oy[write], ox[write]
+        delta = not_fill[write].astype(np.int64) - (self.pool[tiles, oy, ox] != self.fill_value)
+        np.add.at(self.counts, tiles, delta)
+        self.pool[tiles, oy, ox] = values[write]
+
+        emptied = write.copy()
+        emptied[write] = self.counts[tiles] == 0
+        if emptied.any():
+            self._release(ty[emptied], tx[emptied])
+
+    def fill(self, value):
+        """Reset every cell to the fill value, releasing all the tiles."""
+        assert value == self.fill_value, "A ChunkedGrid can only be filled with its fill value"
+        self.tiles[:] = 0
+        self.pool[:] = self.fill_value
+        self.counts[:] = 0
+        self._free = list(range(len(self.pool) - 1, 0, -1))
+
+    def _allocate(self, n):
+        if len(self._free) < n:
+            extra = max(n - len(self._free), len(self.pool))
+            start = len(self.pool)
+            tile_shape = self.pool.shape[1:]
+            self.pool = np.concatenate([self.pool, np.full((extra, *tile_shape), self.fill_value, dtype=self.dtype)])
+            self.counts = np.concatenate([self.counts, np.zeros(extra, dtype=np.int64)])
+            self._free.extend(range(start + extra - 1, start - 1, -1))
+        return np.array([self._free.pop() for _ in range(n)], dtype=np.int64)
+
+    def _release(self, ty, tx):
+        """Give the (empty) tiles back to the pool."""
+        flat = np.unique(ty * self.tiles.shape[1] + tx)
+        tiles = self.tiles.flat[flat]
+        tiles = tiles[tiles != 0]
+        self.pool[tiles] = self.fill_value
+        self.tiles.flat[flat] = 0
+        self._free.extend(tiles.tolist())
+
+
+def _is_int(index):
+    return isinstance(index, (int, np.integer))
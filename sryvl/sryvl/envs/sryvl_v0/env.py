@@ -3,9 +3,22 @@ from gym import Env
 from gym.envs.registration import EnvSpec
 from gym.spaces import Discrete, Box
 import numpy as np
+import pickle
 from functools import reduce
-from collections import deque
-from sryvl.envs.sryvl_v0.assets import make_obs
+from sryvl.envs.sryvl_v0.assets import (
+    make_obs,
+    make_symbolic,
+    flatten_planes,
+    plane_scales,
+    PLANE_DTYPES,
+    SYMBOLIC_CHANNELS,
+)
+from sryvl.envs.sryvl_v0.chunks import make_grid
+from sryvl.envs.sryvl_v0.jit import NUMBA_ENABLED, grow_food_picks
+from sryvl.envs.sryvl_v0.kernels import distances_from_center, window_cells, pick_window_cells, sample_masked
+from sryvl.envs.sryvl_v0.stats import EpisodeStats, StepProfiler, STATS_FULL
+from sryvl.envs.sryvl_v0.terminal import TerminalView, ansi_string
+from sryvl.envs.sryvl_v0.world_bank import WorldBank, WORLD_PARAMS
 
 
 np.set_printoptions(linewidth=10000, threshold=np.inf)
@@ -17,6 +30,11 @@ TERRAIN = 3
 BOUNDARY = 4
 POISON = 5
 
+# Lookup tables over the categories: cells no agent can move into, and cells that only agents of
+# size_threshold_to_jump can climb. Used by the batched legal action masks, see kernels.legal_action_masks.
+WALLS = np.isin(np.arange(POISON + 1), [BOUNDARY])
+OBSTACLES = np.isin(np.arange(POISON + 1), [TERRAIN])
+
 ACTION_NONE = 0
 ACTION_LEFT = 1
 ACTION_UP = 2
@@ -41,18 +59,188 @@ POSITION_OFFSETS = {
     ACTION_PLACE_POISON: (0, 0),
 }
 
-
-class Food:
-    def __init__(self, position, expiry_period, is_poison):
-        self.age = 0
-        self.expired = False
-        self.position = position
-        self.expiry_period = expiry_period
-        self.is_poison = is_poison
+# (dy, dx) of each action, indexed by action.
+OFFSETS = np.array([POSITION_OFFSETS[a] for a in range(len(POSITION_OFFSETS))])
+
+# Phases of step() timed by the StepProfiler, in order.
+STEP_PHASES = ("movement", "food_aging", "clear_expired", "grow_food", "legal_actions", "stats", "observe")
+
+
+class FoodStore:
+    """
+    Struct-of-arrays store of the foods in a world.
+
+    Slots are preallocated and reused. A (side, side) grid maps each cell to the slot of the food in it,
+    so finding the food under a position is O(1). A cell holds at most one food.
+    With a chunk_size, the grid is a ChunkedGrid that only allocates the chunks holding foods.
+    """
+
+    EMPTY = -1
+
+    def __init__(self, side, capacity=64, chunk_size=None):
+        self.positions = np.zeros((capacity, 2), dtype=np.int64)
+        self.age = np.zeros(capacity, dtype=np.int64)
+        self.expiry_period = np.zeros(capacity, dtype=np.int64)
+        self.is_poison = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.cells = make_grid((side, side), self.EMPTY, np.int32, chunk_size)
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @property
+    def expired(self):
+        return self.alive & (self.age >= self.expiry_period)
+
+    def live_slots(self):
+        return np.flatnonzero(self.alive)
+
+    def at(self, position) -> int:
+        """Slot of the food at the position, EMPTY if there's none."""
+        return int(self.cells[tuple(position)])
+
+    def add(self, position, expiry_period, is_poison, age=0) -> int:
+        return int(self.add_many([position], expiry_period, is_poison, age)[0])
+
+    def add_many(self, positions, expiry_period, is_poison, age=0):
+        """Add foods at the given (n, 2) positions, replacing any food already in those cells."""
+        positions = np.asarray(positions, dtype=np.int64).reshape(-1, 2)
+        age = np.broadcast_to(age, len(positions))
+        expiry_period = np.broadcast_to(expiry_period, len(positions))
+        is_poison = np.broadcast_to(is_poison, len(positions))
+        # Several new foods in the same cell merge into one.
+        positions, unique = np.unique(positions, axis=0, return_index=True)
+        n = len(positions)
+
+        self.remove(self.cells[tuple(positions.T)])
+        free = np.flatnonzero(~self.alive)
+        if len(free) < n:
+            self._grow(n - len(free))
+            free = np.flatnonzero(~self.alive)
+        slots = free[:n]
+
+        self.positions[slots] = positions
+        self.age[slots] = age[unique]
+        self.expiry_period[slots] = expiry_period[unique]
+        self.is_poison[slots] = is_poison[unique]
+        self.alive[slots] = True
+        self.cells[tuple(positions.T)] = slots
+        return slots
+
+    def remove(self, slots):
+        slots = np.asarray(slots).reshape(-1)
+        slots = slots[slots != self.EMPTY]
+        self.alive[slots] = False
+        self.cells[tuple(self.positions[slots].T)] = self.EMPTY
 
     def step(self):
-        self.age += 1
-        self.expired = self.age >= self.expiry_period
+        self.age[self.alive] += 1
+
+    def get_state(self):
+        live = self.live_slots()
+        return (
+            live.astype(np.int32),
+            self.positions[live].astype(np.int32),
+            self.age[live].astype(np.int32),
+            self.expiry_period[live].astype(np.int32),
+            self.is_poison[live],
+        )
+
+    def set_state(self, slots, positions, age, expiry_period, is_poison):
+        """Restore a get_state() snapshot, slot for slot, so later draws over the slots happen in the same order."""
+        if len(slots) and slots[-1] >= len(self.alive):
+            self._grow(slots[-1] + 1 - len(self.alive))
+        self.alive[:] = False
+        self.cells.fill(self.EMPTY)
+        self.positions[slots] = positions
+        self.age[slots] = age
+        self.expiry_period[slots] = expiry_period
+        self.is_poison[slots] = is_poison
+        self.alive[slots] = True
+        self.cells[tuple(self.positions[slots].T)] = slots
+
+    def remove_expired(self):
+        """Remove the expired foods and return their slots."""
+        slots = np.flatnonzero(self.expired)
+        self.remove(slots)
+        return slots
+
+    def _grow(self, n):
+        capacity = len(self.alive)
+        extra = max(n, capacity)
+        self.positions = np.concatenate([self.positions, np.zeros((extra, 2), dtype=np.int64)])
+        self.age = np.concatenate([self.age, np.zeros(extra, dtype=np.int64)])
+        self.expiry_period = np.concatenate([self.expiry_period, np.zeros(extra, dtype=np.int64)])
+        self.is_poison = np.concatenate([self.is_poison, np.zeros(extra, dtype=bool)])
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+
+
+class AgentHistory:
+    """
+    The last maxlen (position, size) entries of the agent in a ring buffer.
+
+    plane holds the sum of the sizes recorded in each cell. It is updated as entries arrive and leave,
+    so reading it costs nothing per step. With a chunk_size, it is a ChunkedGrid around the agent's path.
+    """
+
+    def __init__(self, side, maxlen, chunk_size=None):
+        self.maxlen = maxlen
+        self.positions = np.zeros((maxlen, 2), dtype=np.int64)
+        self.sizes = np.zeros(maxlen)
+        self.plane = make_grid((side, side), 0.0, np.float64, chunk_size)
+        self._counts = make_grid((side, side), 0, np.int64, chunk_size)
+        self._n_appended = 0
+
+    def __len__(self):
+        return min(self._n_appended, self.maxlen)
+
+    def __iter__(self):
+        """(position, size) entries, oldest first."""
+        start = self._n_appended - len(self)
+        for i in range(start, self._n_appended):
+            i %= self.maxlen
+            yield tuple(self.positions[i]), self.sizes[i]
+
+    def append(self, position, size):
+        head = self._n_appended % self.maxlen
+        if self._n_appended >= self.maxlen:
+            cell = (int(self.positions[head, 0]), int(self.positions[head, 1]))
+            self._counts[cell] -= 1
+            # Reset instead of subtracting so that float round off doesn't pile up in visited cells.
+            self.plane[cell] = self.plane[cell] - self.sizes[head] if self._counts[cell] else 0.0
+
+        cell = (int(position[0]), int(position[1]))
+        self.positions[head] = cell
+        self.sizes[head] = size
+        self._counts[cell] += 1
+        self.plane[cell] += size
+        self._n_appended += 1
+
+    def get_state(self):
+        """
+        The entries and the plane values of the visited cells. The plane is kept as is rather than summed again
+        on set_state(): its running sums round differently.
+        """
+        n = len(self)
+        cells = tuple(np.unique(self._entry_cells(n), axis=0).T)
+        return self.positions[:n].astype(np.int32), self.sizes[:n].copy(), self._n_appended, self.plane[cells]
+
+    def set_state(self, positions, sizes, n_appended, plane):
+        n = len(positions)
+        self.positions[:n] = positions
+        self.sizes[:n] = sizes
+        self._n_appended = n_appended
+
+        self.plane.fill(0.0)
+        self._counts.fill(0)
+        cells, entries = np.unique(self._entry_cells(n), axis=0, return_inverse=True)
+        cells = tuple(cells.T)
+        self._counts[cells] = np.bincount(entries.reshape(-1), minlength=len(cells[0]))
+        self.plane[cells] = plane
+
+    def _entry_cells(self, n):
+        """(n_entries, 2) plane cells of the first n entries."""
+        return self.positions[:n]
 
 
 class SrYvlLvl0Env(Env):
@@ -62,6 +250,8 @@ class SrYvlLvl0Env(Env):
             "ansi",
             "rgb_array",
             "flattened_planes",
+            "symbolic",
+            "terminal",
         ]
     }
     reward_range = (1, 1)
@@ -94,7 +284,26 @@ class SrYvlLvl0Env(Env):
         terrain_resolution=8,
         terrain_intensity=0.8,
         max_inventory=5,
+        world_bank=None,
+        stats_level=STATS_FULL,
+        plane_dtype=np.float64,
+        chunk_size=None,
+        observation_mode="rgb_array",
+        cell_pixels=1,
+        frame_skip=1,
+        profile=False,
     ):
+        """
+        world_bank: optional WorldBank, or path to one, to sample the initial worlds from instead of generating them.
+        stats_level: how much of stats_agg to collect: "off", "counters" or "full". See EpisodeStats.
+        plane_dtype: dtype of the flattened_planes observation. One of PLANE_DTYPES, uint8 is quantized.
+        chunk_size: store the sparse per-cell layers (food slots and agent history) in lazily allocated
+            chunk_size x chunk_size chunks instead of dense grids. For very large worlds, e.g. 32 with world_size=2000.
+        observation_mode: render mode of observe(): "rgb_array", "flattened_planes" or "symbolic".
+        cell_pixels: side of the block of pixels of each cell in the symbolic mode.
+        frame_skip: number of frames each step() repeats the action for.
+        profile: time each phase of step() with a StepProfiler. See profile_report().
+        """
         super(SrYvlLvl0Env, self).__init__()
 
         self.world_size = world_size
@@ -114,88 +323,80 @@ class SrYvlLvl0Env(Env):
         self.terrain_resolution = terrain_resolution
         self.terrain_intensity = terrain_intensity
         self.max_inventory = max_inventory
+        self.stats_level = stats_level
+        self.chunk_size = chunk_size
+        assert np.dtype(plane_dtype) in PLANE_DTYPES, f"plane_dtype must be one of {PLANE_DTYPES}"
+        self.plane_dtype = np.dtype(plane_dtype)
+        self._plane_scales = plane_scales(max_agent_size, world_size)
+        window = observation_radius * 2 + 1
+        self._planes = np.zeros((7, window, window))
+
+        assert observation_mode in ("rgb_array", "flattened_planes", "symbolic")
+        self.observation_mode = observation_mode
+        self.cell_pixels = cell_pixels
+        self.frame_skip = frame_skip
+        self.profiler = StepProfiler(STEP_PHASES, enabled=profile)
+        self.observation_space = self.make_observation_space(observation_mode)
+
+        if isinstance(world_bank, str):
+            world_bank = WorldBank(world_bank)
+        if world_bank is not None:
+            world_bank.check_params(**{name: getattr(self, name) for name in WORLD_PARAMS})
+        self.world_bank = world_bank
 
         self.agent_size = 1
         self.agent_position = [0, 0]
-        self.foods: List[Food] = []
+        self.foods = FoodStore(side=0)
         self.plant_inventory = 0
         self.poison_inventory = 0
         self.terrain: List[Tuple[int, int]] = []
         self.world = np.array([])
+        self.static = np.array([])
+        self._terrain_map = np.array([])
         self.boundary_indices: List[Tuple[int, int]] = []
         self._distances_from_center = np.array([])
 
-        self.legal_actions = np.ones(self.action_space.n)
+        self.legal_actions = np.ones(self.action_space.n, dtype=np.int64)
         self.done = False
-        self.agent_history = deque(maxlen=world_size)
+        self.agent_history = AgentHistory(side=0, maxlen=world_size)
 
-        self.stats_agg = {}
+        self.stats_agg = EpisodeStats(stats_level)
+        self._terminal = None
 
         self.reset()
 
-    def render(self, mode="human"):
+    def render(self, mode="human", out=None):
+        """
+        - human: prints the agent size and the world
+        - ansi: returns the world as a string
+        - terminal: redraws the world on the terminal, rewriting only the cells that changed since the last call
+
+        out: for rgb_array, flattened_planes and symbolic, optional preallocated buffer to write the observation into.
+        It must have the shape and dtype of make_observation_space(mode).
+        """
         assert mode in self.metadata['render_modes']
 
-        if mode in ("human", 'ansi'):
+        if mode == "ansi":
+            return ansi_string(self._text_frame())
+        if mode == "human":
             print(self.agent_size)
-            world = self.world.copy()
-            world[tuple(self.agent_position)] = AGENT
-
-            state = "\n".join([" ".join(i) for i in world.astype(str)])
-            state = state.replace("4", "□")  # Boundary
-            state = state.replace("3", "■")  # Terrain
-            state = state.replace("2", "•")  # Food
-            state = state.replace("1", "🔺")  # Player
-            state = state.replace("0", " ")  # Nothing
-            state = state.replace("5", "◦")  # Poison
-            state = state.replace(".", "")
-
-            print(state)
+            print(ansi_string(self._text_frame()))
+        elif mode == "terminal":
+            if self._terminal is None:
+                self._terminal = TerminalView()
+            self._terminal.draw(self._text_frame(), status=f"size: {np.round(self.agent_size, 3)}")
         else:
-            """
-            planes:
-            0: Boundary
-            1: Terrain
-            2: Food Ages
-            3: Poison Ages
-            4: Player Health
-            5: Dist b/w center of the map to each point
-            6: Previous path of the player health
-            """
-
-            r = self.observation_radius
-            y = self.agent_position[0]
-            x = self.agent_position[1]
-            x0, y0, x1, y1 = x - r, y - r, x + r + 1, y + r + 1
-            window = self.world[y0:y1, x0:x1]
-
-            boundary = (window == BOUNDARY) * 1.0
-            terrain = self._observe_terrain()[y0:y1, x0:x1]
-            food_ages = self._observe_food_ages(is_poison=False)[y0:y1, x0:x1]
-            poison_ages = self._observe_food_ages(is_poison=True)[y0:y1, x0:x1]
-            player_health = np.zeros_like(window, dtype=float)
-            player_health[self.observation_radius, self.observation_radius] = self.agent_size
-            distances_from_center = self._distances_from_center[y0:y1, x0:x1]
-            history = self._draw_history_map()[y0:y1, x0:x1]
-
-            obs = np.array(
-                [
-                    boundary,
-                    terrain,
-                    food_ages,
-                    poison_ages,
-                    player_health,
-                    distances_from_center,
-                    history,
-                ]
-            )
+            planes = self._observe_planes()
             if mode == "flattened_planes":
-                obs = obs.flatten()
-            else:  # mode == 'rgb_array':
-                obs = make_obs(obs, self.plant_inventory, self.poison_inventory, self.size_threshold_to_jump)
-            return obs
-
-    def step(self, action: int) -> Tuple[np.array, float, bool, dict]:
+                return flatten_planes(planes, self.plane_dtype, self._plane_scales, out=out)
+            if mode == "symbolic":
+                return make_symbolic(
+                    planes, self.plant_inventory, self.poison_inventory, self._plane_scales, self.cell_pixels, out=out
+                )
+            # mode == 'rgb_array':
+            return make_obs(planes, self.plant_inventory, self.poison_inventory, self.size_threshold_to_jump, out=out)
+
+    def step(self, action: int, out=None, observe=True) -> Tuple[np.array, float, bool, dict]:
         """
         0 = no action
         1 = left
@@ -216,10 +417,46 @@ class SrYvlLvl0Env(Env):
         - reward = 1
         - Find the legal actions
         - Redraw world
+
+        The action is repeated for frame_skip frames, or until done. The rewards of the frames are summed,
+        and the observation is rendered once, after the last frame.
+
+        out: optional preallocated buffer for the observation, see render().
+        observe: when False, the observation is not rendered and None is returned in its place.
+            Call observe() later if it turns out to be needed.
         """
+        reward = 0.0
+        for _ in range(self.frame_skip):
+            self._advance(action)
+            reward += self.reward()
+            if self.done:
+                break
 
-        self.agent_history.append((tuple(self.agent_position), self.agent_size))
-        self.stats_agg['actions'].append(action)
+        obs, info = self._finish_step(self.done, out, observe)
+        return obs, reward, self.done, info
+
+    def _finish_step(self, episode_over, out, observe):
+        """
+        The observation and the info of a step. Once the episode is over, info holds the episode summary and,
+        with profile=True, the profile report, taken after the observe phase of the step.
+        """
+        self.profiler.start()
+        obs = self.observe(out=out) if observe else None
+        self.profiler.lap("observe")
+        info = {}
+        if episode_over:
+            info["episode"] = self.episode_summary()
+            if self.profiler.enabled:
+                info["profile"] = self.profile_report()
+        return obs, info
+
+    def _advance(self, action: int):
+        """One frame of the game, see step()."""
+        stats = self.stats_agg
+        profiler = self.profiler
+        profiler.start()
+        self.agent_history.append(self.agent_position, self.agent_size)
+        stats.record('actions', action)
 
         if self.legal_actions[action] == 0:  # Illegal action == Noop
             action = 0
@@ -230,10 +467,11 @@ class SrYvlLvl0Env(Env):
 
         # ----- HEALTH -----
         self._shrink_agent(moved=(x != 0 or y != 0))
+        killed_poison = False
         if action == ACTION_EAT:
             self._grow_agent()
         elif action == ACTION_KILL:
-            self._kill_food()
+            killed_poison = self._kill_food()
 
         # ----- FOODS ------
         if action == ACTION_STORE:
@@ -242,78 +480,167 @@ class SrYvlLvl0Env(Env):
             self._plant_item(poison=False)
         elif action == ACTION_PLACE_POISON:
             self._plant_item(poison=True)
+        profiler.lap("movement")
 
-        [food.step() for food in self.foods]
-        self.stats_agg['n_foods_expired'].append(sum([1 for food in self.foods if food.expired]))
+        self.foods.step()
+        profiler.lap("food_aging")
         self._clear_expired_foods()
+        profiler.lap("clear_expired")
         self._grow_more_food()
+        profiler.lap("grow_food")
 
-        self.draw_env()
         self.legal_actions = self._find_legal_actions()
         if sum(self.legal_actions) == 0:
             self.done = True
+        profiler.lap("legal_actions")
 
-        self.stats_agg["steps"] += 1
-        self.stats_agg['health'].append(self.agent_size)
-        self.stats_agg['has_eaten'].append(action == ACTION_EAT)
+        stats.count("steps")
+        if stats.enabled:
+            stats.record('health', self.agent_size)
+            stats.record('has_eaten_food', action == ACTION_EAT)
+            stats.record('has_killed_poison', killed_poison)
+        profiler.lap("stats")
 
-        return self.observe(), self.reward(), self.done, {}
+    def reset(self, *_args, seed=None, **_kwargs) -> None:
+        """seed: seeds self.np_random, the generator behind every random draw of this env."""
+        super().reset(seed=seed)
 
-    def reset(self, *_args, **_kwargs) -> None:
+        side = self.world_size + (self.observation_radius * 2)
+        if self.world_bank is None:
+            self._generate_world(side)
+        else:
+            self._load_world(*self.world_bank.get(self.world_bank.sample(rng=self.np_random)))
+        self.draw_env()
+        self._reset_agents(side)
+        self._distances_from_center = self._get_distances_from_center(side)
+
+        self.stats_agg = EpisodeStats(self.stats_level, max_buffer=500)
+
+        return self.observe()
+
+    def _reset_agents(self, side):
         self.agent_size = 1
+        self.agent_position = self._get_agent_initial_position()
+        self.legal_actions = self._find_legal_actions()
+        self.done = False
+        self.agent_history = AgentHistory(side, maxlen=self.world_size, chunk_size=self.chunk_size)
+        self.plant_inventory = 0
+        self.poison_inventory = 0
 
-        side = self.world_size + (self.observation_radius * 2)
-        self.world = np.zeros((side, side), dtype=int)
+    def episode_summary(self) -> dict:
+        """Diagnostics of the current episode so far, as collected at the stats_level. Also in info when done."""
+        return self.stats_agg.summary()
+
+    def profile_report(self) -> dict:
+        """
+        Time spent in each phase of step() since the env was built, with profile=True: see StepProfiler.report().
+        Also in info when done. Draws are incremental, so their time counts in the phase that changed the cells.
+        """
+        return self.profiler.report()
+
+    def _generate_world(self, side):
+        self.static = np.zeros((side, side), dtype=np.uint8)
 
         food_positions = self.get_initial_food_positions(
-            side, self.initial_food_density
+            side, self.initial_food_density, rng=self.np_random
         )
-        self.fill_indices(self.world, food_positions, FOOD)
 
         self.terrain = self.make_terrain(
-            side, self.terrain_resolution, self.terrain_intensity
+            side, self.terrain_resolution, self.terrain_intensity, rng=self.np_random
         )
-        self.fill_indices(self.world, self.terrain, TERRAIN)
+        self.fill_indices(self.static, self.terrain, TERRAIN)
+        self._terrain_map = np.zeros((side, side), dtype=bool)
+        self.fill_indices(self._terrain_map, self.terrain, True)
 
         self.boundary_indices = self.make_boundary(side, self.observation_radius)
-        self.fill_indices(self.world, self.boundary_indices, BOUNDARY)
+        self.fill_indices(self.static, self.boundary_indices, BOUNDARY)
+
+        # Terrain and boundary take over the foods that fall on them.
+        food_positions = food_positions[self.static[tuple(food_positions.T)] == NOTHING]
+        self.foods = FoodStore(side, capacity=max(len(food_positions), 1), chunk_size=self.chunk_size)
+        self.foods.add_many(
+            food_positions,
+            self.food_expiry_period,
+            is_poison=self.np_random.random(len(food_positions)) < self.poison_fraction,
+            age=self.np_random.integers(self.food_expiry_period, size=len(food_positions)),
+        )
 
-        self.foods = [
-            Food(pos, self.food_expiry_period, np.random.rand() < self.poison_fraction)
-            for pos in self.find_indices(self.world, FOOD)
-        ]
-        for food in self.foods:
-            food.age = np.random.randint(self.food_expiry_period)
-            if food.is_poison:
-                self.world[tuple(food.position)] = POISON
+    def _load_world(self, static, terrain, food_positions, food_poison, food_age):
+        """Set up the static layer and the foods from an initial world of a WorldBank."""
+        side = len(static)
+        self.static = np.array(static)
+        self._terrain_map = np.array(terrain)
+        self.terrain = self.find_indices(self._terrain_map, True)
+        self.boundary_indices = self.find_indices(self.static, BOUNDARY)
 
-        self.agent_position = self._get_agent_initial_position()
+        # The bank's foods are unique and row-major: they take slots 0..n-1, like add_many() would give them.
+        n = len(food_positions)
+        self.foods = FoodStore(side, capacity=max(n, 1), chunk_size=self.chunk_size)
+        self.foods.set_state(np.arange(n), food_positions, food_age, self.food_expiry_period, food_poison)
 
-        self.legal_actions = self._find_legal_actions()
-        self.done = False
-        self.agent_history = []
-        self.plant_inventory = 0
-        self.poison_inventory = 0
-        self._distances_from_center = self._get_distances_from_center(side)
+    def get_state(self) -> bytes:
+        """
+        Compact snapshot of everything step() depends on: world, foods, agent, inventories, history and RNG.
+        Episode statistics (stats_agg) are not part of it. Restore with set_state() on an env with the same parameters.
+        """
+        state = (
+            self._get_agent_state(),
+            self.world.copy(),
+            np.packbits(self._terrain_map),
+            self.foods.get_state(),
+            self.np_random.bit_generator.state,
+        )
+        return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
 
-        max_buffer = 500
-        self.stats_agg = {
-            "steps": 0,
-            "food_eaten": 0,
-            'poison_eaten': 0,
-            'actions': deque(maxlen=max_buffer),
-            "n_foods_available": deque(maxlen=max_buffer),
-            "n_foods_expired": deque(maxlen=max_buffer),
-            "n_foods_generated": deque(maxlen=max_buffer),
-            "has_eaten_food": deque(maxlen=max_buffer),
-            "has_killed_poison": deque(maxlen=max_buffer),
-            "health": deque(maxlen=max_buffer),
-        }
+    def set_state(self, state: bytes):
+        agent_state, world, terrain, foods, rng_state = pickle.loads(state)
 
-        return self.observe()
+        side = len(world)
+        self.static = np.where((world == TERRAIN) | (world == BOUNDARY), world, NOTHING).astype(np.uint8)
+        self._terrain_map = np.unpackbits(terrain, count=side * side).reshape(side, side).astype(bool)
+        self.terrain = self.find_indices(self._terrain_map, True)
+        self.boundary_indices = self.find_indices(world, BOUNDARY)
+        self.world = world.copy()
 
-    def observe(self) -> np.array:
-        return self.render(mode="rgb_array")
+        if len(self.foods.cells) != side:
+            self.foods = FoodStore(side, chunk_size=self.chunk_size)
+        self.foods.set_state(*foods)
+        self._set_agent_state(agent_state, side)
+
+        self.np_random.bit_generator.state = rng_state
+        self.legal_actions = self._find_legal_actions()
+
+    def _get_agent_state(self):
+        agent = np.array(
+            [self.agent_position[0], self.agent_position[1], self.plant_inventory, self.poison_inventory, self.done],
+            dtype=np.int64,
+        )
+        return agent, self.agent_size, self.agent_history.get_state()
+
+    def _set_agent_state(self, state, side):
+        agent, self.agent_size, history = state
+        y, x, self.plant_inventory, self.poison_inventory, done = agent.tolist()
+        self.agent_position = np.array([y, x])
+        self.done = bool(done)
+
+        if len(self.agent_history.plane) != side:
+            self.agent_history = AgentHistory(side, maxlen=self.world_size, chunk_size=self.chunk_size)
+        self.agent_history.set_state(*history)
+
+    def observe(self, out=None) -> np.array:
+        return self.render(mode=self.observation_mode, out=out)
+
+    def make_observation_space(self, mode) -> Box:
+        """Space of the observations that render(mode) returns, for the observation_radius of this env."""
+        window = self.observation_radius * 2 + 1
+        if mode == "rgb_array":
+            return Box(low=0, high=255, shape=(3, window * 9, window * 9), dtype=np.uint8)
+        if mode == "symbolic":
+            side = window * self.cell_pixels
+            return Box(low=0, high=255, shape=(len(SYMBOLIC_CHANNELS), side, side), dtype=np.uint8)
+        # mode == "flattened_planes"
+        high = 255 if self.plane_dtype == np.uint8 else np.inf
+        return Box(low=0, high=high, shape=(7 * window * window,), dtype=self.plane_dtype)
 
     def reward(self) -> float:
         # return (self.stats_agg["steps"] / 100) ** 2 * self.agent_size
@@ -324,127 +651,148 @@ class SrYvlLvl0Env(Env):
         return -float(self.done)
 
     def sample_action(self):
-        mask = self.legal_actions.astype(float)
-        assert sum(mask) > 0, "No legal actions"
-        return np.random.choice(len(mask), p=mask / mask.sum())
+        assert self.legal_actions.any(), "No legal actions"
+        return int(sample_masked(self.legal_actions[None], self.np_random.random(1))[0])
 
     def draw_env(self) -> np.array:
-        side = self.world_size + (self.observation_radius * 2)
-        self.world = np.ones((side, side), dtype=int) * NOTHING
-        self.fill_indices(self.world, [f.position for f in self.foods if not f.is_poison], FOOD)
-        self.fill_indices(self.world, [f.position for f in self.foods if f.is_poison], POISON)
-        self.fill_indices(self.world, self.terrain, TERRAIN)
-        self.fill_indices(self.world, self.boundary_indices, BOUNDARY)
-
-    def _observe_food_ages(self, is_poison: False):
-        ages = np.zeros((len(self.world), len(self.world)))
-        for food in self.foods:
-            if (is_poison and food.is_poison) or (not is_poison and not food.is_poison):
-                ages[tuple(food.position)] = food.age / self.food_expiry_period
-        return ages
-
-    def _observe_terrain(self):
-        terrain = np.zeros((len(self.world), len(self.world)))
-        self.fill_indices(terrain, self.terrain, 1)
-        return terrain
+        """Redraw the whole world. step() only redraws the cells it changes, see _draw_cells."""
+        self.world = self.static.copy()
+        self._draw_cells(self.foods.positions[self.foods.live_slots()])
+
+    def _draw_cells(self, positions):
+        """Redraw the given cells from the static layer (terrain + boundary) and the food store."""
+        cells = tuple(np.asarray(positions, dtype=np.int64).reshape(-1, 2).T)
+        slots = self.foods.cells[cells]
+        food = np.where(self.foods.is_poison[slots], POISON, FOOD)
+        food[slots == FoodStore.EMPTY] = NOTHING
+        static = self.static[cells]
+        self.world[cells] = np.where(static != NOTHING, static, food)
+
+    def _text_frame(self):
+        """The world with the agent drawn in, for the text render modes."""
+        frame = self.world.copy()
+        frame[tuple(np.reshape(self.agent_position, (-1, 2)).T)] = AGENT
+        return frame
+
+    def _observe_planes(self):
+        """
+        planes:
+        0: Boundary
+        1: Terrain
+        2: Food Ages
+        3: Poison Ages
+        4: Player Health
+        5: Dist b/w center of the map to each point
+        6: Previous path of the player health
+        """
+        r = self.observation_radius
+        y = self.agent_position[0]
+        x = self.agent_position[1]
+        x0, y0, x1, y1 = x - r, y - r, x + r + 1, y + r + 1
+        window = np.s_[y0:y1, x0:x1]
+
+        planes = self._planes
+        np.equal(self.world[window], BOUNDARY, out=planes[0], casting="unsafe")
+        planes[1] = self._terrain_map[window]
+        self._observe_food_ages(self.foods.cells[window], out=planes[2:4])
+        planes[4] = 0
+        planes[4, r, r] = self.agent_size
+        planes[5] = self._distances_from_center[window]
+        planes[6] = self.agent_history.plane[window]
+        return planes
+
+    def _observe_food_ages(self, slots, out):
+        """Food and poison ages of the given cells' food slots, written into out[0] and out[1]."""
+        has_food = slots != FoodStore.EMPTY
+        ages = np.where(has_food, self.foods.age[slots] / self.food_expiry_period, 0.0)
+        is_poison = self.foods.is_poison[slots]
+        np.copyto(out[0], np.where(is_poison, 0.0, ages))
+        np.copyto(out[1], np.where(is_poison, ages, 0.0))
 
     def _grow_more_food(self):
-        more_foods = []
-        for food in self.foods:
-            growth_window = self._get_food_growth_window(food)
+        slots = self.foods.live_slots()
+        ys, xs = self.foods.positions[slots].T
+
+        # Older plants will have higher probability of growing more plants
+        chance = self.foods.age[slots] / (self.food_expiry_period**1.5) > self.np_random.random(len(slots))
+        slots, ys, xs = slots[chance], ys[chance], xs[chance]
+        # The uniforms picking the new cells, only for the foods that may grow.
+        window = (2 * self.food_growth_radius + 1) ** 2
+        u = self.np_random.random((len(slots), window))
+
+        if NUMBA_ENABLED and isinstance(self.foods.cells, np.ndarray):
+            grown, new_ys, new_xs = grow_food_picks(
+                np.zeros_like(ys), ys, xs, u, self.food_growth_radius, np.array([self.food_growth_density]),
+                self.foods.cells[None], FoodStore.EMPTY, self.world[None], NOTHING,
+            )
+            parents = slots[grown]
+            found = np.ones(len(grown), dtype=bool)
+        else:
+            # Only the windows around the foods that may grow are read, never the whole world.
+            cy, cx, inside = window_cells(ys, xs, self.food_growth_radius, self.world.shape)
             # Cannot grow more than the set density
-            if not self._enough_food_already_exists_nearby(growth_window):
-                # Older plants will have higher probability of growing more plants
-                chance = food.age / (self.food_expiry_period**1.5) > np.random.rand()
-                if chance:
-                    random_position = self._get_random_position_nearby(growth_window)
-                    if random_position is not None:
-                        # Converting from window indices to world indices
-                        random_position[0] += food.position[0] - self.food_growth_radius
-                        random_position[1] += food.position[1] - self.food_growth_radius
-                        if random_position is not None:
-                            more_foods.append(
-                                Food(
-                                    random_position,
-                                    self.food_expiry_period,
-                                    food.is_poison,
-                                )
-                            )
-        self.stats_agg['n_foods_generated'].append(len(more_foods))
-        self.foods.extend(more_foods)
-        self.stats_agg['n_foods_available'].append(len(self.foods))
-
-    def _enough_food_already_exists_nearby(self, growth_window):
-        """num_food in radius < food_growth_density"""
-        num_food = len(SrYvlLvl0Env.find_indices(growth_window, FOOD)) - 1
-        return num_food >= self.food_growth_density
-
-    def _get_food_growth_window(self, food):
-        y = food.position[0]
-        x = food.position[1]
-
-        x0 = max(0, x - self.food_growth_radius)
-        y0 = max(0, y - self.food_growth_radius)
-        x1 = min(len(self.world), x + self.food_growth_radius + 1)
-        y1 = min(len(self.world), y + self.food_growth_radius + 1)
-
-        return self.world[y0:y1, x0:x1]
-
-    def _draw_history_map(self):
-        side = len(self.world)
-        history = np.zeros((side, side))
-        for position, health in self.agent_history:
-            history[tuple(position)] += health
-        return history
-
-    @staticmethod
-    def _get_random_position_nearby(growth_window):
-        empty_positions = SrYvlLvl0Env.find_indices(growth_window, NOTHING)
-        if len(empty_positions) > 0:
-            return empty_positions[np.random.choice(len(empty_positions))]
+            num_food = (inside & (self.foods.cells[cy, cx] != FoodStore.EMPTY)).sum(axis=1) - 1
+            growing = num_food < self.food_growth_density
+
+            cy, cx = cy[growing], cx[growing]
+            free = inside[growing] & (self.world[cy, cx] == NOTHING)
+            new_ys, new_xs, found = pick_window_cells(cy, cx, free, u[growing])
+            parents = slots[growing][found]
+
+        self.stats_agg.record('n_foods_generated', int(found.sum()))
+        if found.any():
+            new_positions = np.stack([new_ys[found], new_xs[found]], axis=1)
+            new_slots = self.foods.add_many(new_positions, self.food_expiry_period, self.foods.is_poison[parents])
+            self._draw_cells(self.foods.positions[new_slots])
+        if self.stats_agg.enabled:
+            self.stats_agg.record('n_foods_available', len(self.foods))
 
     def _grow_agent(self):
-        i = [i for i, f in enumerate(self.foods) if tuple(f.position) == tuple(self.agent_position)][0]
-        food = self.foods[i]
+        slot = self.foods.at(self.agent_position)
 
-        delta = self._get_food_yield(food.age)
-        if food.is_poison:
+        delta = self._get_food_yield(self.foods.age[slot])
+        if self.foods.is_poison[slot]:
             self.agent_size -= delta
-            self.stats_agg['poison_eaten'] += 1
+            self.stats_agg.count('poison_eaten')
         elif self.agent_size + delta <= self.max_agent_size:
             self.agent_size += delta
-            self.stats_agg['food_eaten'] += 1
-        del self.foods[i]
+            self.stats_agg.count('food_eaten')
+        self.foods.remove(slot)
+        self._draw_cells(self.agent_position)
 
     def _shrink_agent(self, moved: bool):
         shrink_rate_movement = self._get_shrink_rate_movement()
         shrink_rate_movement *= 1 if moved else self.movement_shrink_penalty
         self.agent_size -= shrink_rate_movement
 
-    def _kill_food(self):
-        i = [i for i, f in enumerate(self.foods) if tuple(f.position) == tuple(self.agent_position)][0]
-        del self.foods[i]
+    def _kill_food(self) -> bool:
+        """Returns whether the killed food was poisonous."""
+        slot = self.foods.at(self.agent_position)
+        self.foods.remove(slot)
+        self._draw_cells(self.agent_position)
+        return bool(self.foods.is_poison[slot])
 
     def _store_item(self):
-        i = [i for i, f in enumerate(self.foods) if tuple(f.position) == tuple(self.agent_position)][0]
-        if self.foods[i].is_poison:
+        slot = self.foods.at(self.agent_position)
+        if self.foods.is_poison[slot]:
             self.poison_inventory += 1
         else:
             self.plant_inventory += 1
-        del self.foods[i]
+        self.foods.remove(slot)
+        self._draw_cells(self.agent_position)
 
     def _plant_item(self, poison: bool):
-        self.foods.append(Food(list(self.agent_position), self.food_expiry_period, is_poison=poison))
-        self.world[tuple(self.agent_position)] = POISON if poison else FOOD
+        self.foods.add(self.agent_position, self.food_expiry_period, is_poison=poison)
+        self._draw_cells(self.agent_position)
         if poison:
             self.poison_inventory -= 1
         else:
             self.plant_inventory -= 1
 
     def _clear_expired_foods(self):
-        self.foods = [food for food in self.foods if not food.expired]
-        self.fill_indices(self.world, self.find_indices(self.world, FOOD), NOTHING)
-        self.fill_indices(self.world, [f.position for f in self.foods], FOOD)
+        slots = self.foods.remove_expired()
+        self.stats_agg.record('n_foods_expired', len(slots))
+        self._draw_cells(self.foods.positions[slots])
 
     def _find_legal_actions(self):
         """
@@ -454,7 +802,7 @@ class SrYvlLvl0Env(Env):
             - if the agent size < threshold, then d is illegal
         """
         if self.agent_size <= 0:
-            return np.zeros(self.action_space.n)
+            return np.zeros(self.action_space.n, dtype=np.int64)
 
         nothing, left, up, right, down, eat, kill, store, place_plant, place_poison = 1, 1, 1, 1, 1, 0, 0, 0, 0, 0
 
@@ -508,19 +856,11 @@ class SrYvlLvl0Env(Env):
 
     def _get_agent_initial_position(self):
         available_indices = np.array((self.world == NOTHING).nonzero()).T
-        return available_indices[np.random.choice(len(available_indices))]
+        return available_indices[self.np_random.choice(len(available_indices))]
 
     @staticmethod
     def _get_distances_from_center(side):
-        dist = np.zeros((side, side))
-        center = side // 2
-        max_distance = np.linalg.norm(np.array([0, 0]) - np.array([center, center]))
-        for i in range(side):
-            for j in range(side):
-                distance = np.linalg.norm(np.array([i, j]) - np.array([center, center]))
-                distance /= max_distance
-                dist[i, j] = distance
-        return dist
+        return distances_from_center(side)
 
     @staticmethod
     def find_indices(world, category):
@@ -528,7 +868,7 @@ class SrYvlLvl0Env(Env):
 
     @staticmethod
     def make_terrain(
-        world_size, terrain_resolution, terrain_intensity
+        world_size, terrain_resolution, terrain_intensity, rng=np.random
     ) -> List[Tuple[int, int]]:
         """
         Add perlin noise for terrain, then another layer of perlin noise as nothing.
@@ -536,7 +876,7 @@ class SrYvlLvl0Env(Env):
 
         size = world_size + terrain_resolution - world_size % terrain_resolution
         terrain = generate_perlin_noise_2d(
-            shape=(size, size), res=[terrain_resolution, terrain_resolution]
+            shape=(size, size), res=[terrain_resolution, terrain_resolution], rng=rng
         )
         terrain = terrain[:world_size, :world_size]
         return np.array((terrain > (1 - terrain_intensity)).nonzero()).T
@@ -553,27 +893,26 @@ class SrYvlLvl0Env(Env):
 
     @staticmethod
     def get_initial_food_positions(
-        world_size, initial_food_density
+        world_size, initial_food_density, rng=np.random
     ) -> List[Tuple[int, int]]:
-        pos = np.random.random(size=(world_size, world_size))
+        pos = rng.random(size=(world_size, world_size))
         pos = pos < initial_food_density
         pos = np.array(pos.nonzero()).T
         return pos
 
     @staticmethod
     def fill_indices(world, positions, fill):
-        for position in positions:
-            world[tuple(position)] = fill
+        world[tuple(np.asarray(positions, dtype=np.int64).reshape(-1, 2).T)] = fill
 
 
 def play_random():
     stats = []
     for sim in range(1):
         env = SrYvlLvl0Env()
-        env.render(mode="ansi")
+        env.render(mode="terminal")
         for i in range(50000):
             env.step(env.sample_action())
-            env.render(mode="ansi")
+            env.render(mode="terminal")
             if env.done:
                 break
         stats.append(env.stats_agg)
@@ -601,7 +940,7 @@ def human_play():
         print(env.legal_actions, env.agent_size)
 
 
-def generate_perlin_noise_2d(shape, res):
+def generate_perlin_noise_2d(shape, res, rng=np.random):
     def f(t):
         return 6 * t**5 - 15 * t**4 + 10 * t**3
 
@@ -609,7 +948,7 @@ def generate_perlin_noise_2d(shape, res):
     d = (shape[0] // res[0], shape[1] // res[1])
     grid = np.mgrid[0 : res[0] : delta[0], 0 : res[1] : delta[1]].transpose(1, 2, 0) % 1
     # Gradients
-    angles = 2 * np.pi * np.random.rand(res[0] + 1, res[1] + 1)
+    angles = 2 * np.pi * rng.random((res[0] + 1, res[1] + 1))
     gradients = np.dstack((np.cos(angles), np.sin(angles)))
     g00 = gradients[0:-1, 0:-1].repeat(d[0], 0).repeat(d[1], 1)
     g10 = gradients[1:, 0:-1].repeat(d[0], 0).repeat(d[1], 1)
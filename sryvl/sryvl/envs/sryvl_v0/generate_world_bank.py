@@ -0,0 +1,76 @@
+"""
+Generate a WorldBank of initial SrYvl worlds, see world_bank for its layout.
+
+A module of its own rather than part of world_bank, which the envs import: running it with -m then doesn't
+load it twice.
+
+Usage:
+    python -m sryvl.envs.sryvl_v0.generate_world_bank banks/default --n-worlds 10000
+"""
+import argparse
+import json
+import os
+import numpy as np
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.world_bank import WorldBank, WORLD_PARAMS
+
+
+def generate_world_bank(path, n_worlds, seed=None, **env_params):
+    """Reset a SrYvlLvl0Env n_worlds times and store each initial world in a bank at path."""
+    env = SrYvlLvl0Env(**env_params)
+    side = len(env.world)
+    age_dtype = np.uint8 if env.food_expiry_period <= np.iinfo(np.uint8).max else np.uint16
+
+    os.makedirs(path, exist_ok=True)
+    static = np.lib.format.open_memmap(
+        os.path.join(path, "static.npy"), mode="w+", dtype=np.uint8, shape=(n_worlds, side, side)
+    )
+    terrain = np.lib.format.open_memmap(
+        os.path.join(path, "terrain.npy"), mode="w+", dtype=bool, shape=(n_worlds, side, side)
+    )
+
+    food_counts, food_positions, food_poison, food_age = [], [], [], []
+    for i in range(n_worlds):
+        env.reset(seed=seed if i == 0 else None)
+        static[i] = env.static
+        terrain[i] = env._terrain_map
+        slots = env.foods.live_slots()
+        positions = env.foods.positions[slots]
+        slots = slots[np.lexsort(positions.T[::-1])]
+        food_counts.append(len(slots))
+        food_positions.append(env.foods.positions[slots].astype(np.uint16))
+        food_poison.append(env.foods.is_poison[slots])
+        food_age.append(env.foods.age[slots].astype(age_dtype))
+
+    static.flush()
+    terrain.flush()
+    np.save(os.path.join(path, "food_offsets.npy"), np.concatenate([[0], np.cumsum(food_counts)]).astype(np.int64))
+    np.save(os.path.join(path, "food_positions.npy"), np.concatenate(food_positions).reshape(-1, 2))
+    np.save(os.path.join(path, "food_poison.npy"), np.concatenate(food_poison))
+    np.save(os.path.join(path, "food_age.npy"), np.concatenate(food_age))
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump({name: getattr(env, name) for name in WORLD_PARAMS}, f, indent=2)
+    return WorldBank(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate initial SrYvl worlds.")
+    parser.add_argument("path")
+    parser.add_argument("--n-worlds", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--world-size", type=int, default=20)
+    parser.add_argument("--observation-radius", type=int, default=3)
+    parser.add_argument("--initial-food-density", type=float, default=0.2)
+    parser.add_argument("--poison-fraction", type=float, default=0.5)
+    parser.add_argument("--food-expiry-period", type=int, default=50)
+    parser.add_argument("--terrain-resolution", type=int, default=8)
+    parser.add_argument("--terrain-intensity", type=float, default=0.8)
+    args = vars(parser.parse_args())
+
+    path = args.pop("path")
+    bank = generate_world_bank(path, **args)
+    print(f"Saved {len(bank)} worlds of side {bank.side} to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Loop kernels for the parts of a SrYvl step that vectorize poorly, compiled with Numba when it is installed.
+
+Numba is optional. Without it, or with SRYVL_NUMBA=0 in the environment, NUMBA_ENABLED is False and the envs
+keep their NumPy paths. The kernels give the same results as those paths for the same random draws, so the
+rollouts of a seed do not depend on the backend.
+"""
+import os
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+NUMBA_ENABLED = numba is not None and os.environ.get("SRYVL_NUMBA", "1") != "0"
+
+
+def jit(function):
+    """numba.njit the function when Numba is enabled, the plain python function otherwise."""
+    if not NUMBA_ENABLED:
+        return function
+    return numba.njit(cache=True, nogil=True)(function)
+
+
+@jit
+def grow_food_picks(rows, ys, xs, u, radius, density, food, no_food, ground, nothing):
+    """
+    Food growth around the foods at (rows, ys, xs) of the (n_worlds, side, side) grids, the ones that passed the
+    growth chance.
+
+    A food grows when its (2r+1)x(2r+1) window, clipped at the grid edges, holds fewer than density[row] other
+    foods (food != no_food). It grows on the free cell of the window (ground == nothing, no food) with the largest
+    u[i, k], k the row-major index of the cell in the window: the argmax pick of kernels.pick_window_cells.
+
+    Returns the indices of the foods that grew and the (ys, xs) of their new cells.
+    """
+    h = food.shape[1]
+    w = food.shape[2]
+    side = 2 * radius + 1
+    parents = np.empty(len(ys), dtype=np.int64)
+    new_ys = np.empty(len(ys), dtype=np.int64)
+    new_xs = np.empty(len(ys), dtype=np.int64)
+    n = 0
+    for i in range(len(ys)):
+        r, y, x = rows[i], ys[i], xs[i]
+        y0, y1 = max(y - radius, 0), min(y + radius + 1, h)
+        x0, x1 = max(x - radius, 0), min(x + radius + 1, w)
+
+        num_food = -1
+        for cy in range(y0, y1):
+            for cx in range(x0, x1):
+                if food[r, cy, cx] != no_food:
+                    num_food += 1
+        if num_food >= density[r]:
+            continue
+
+        best = -1.0
+        best_y = best_x = 0
+        for cy in range(y0, y1):
+            for cx in range(x0, x1):
+                if ground[r, cy, cx] == nothing and food[r, cy, cx] == no_food:
+                    v = u[i, (cy - y + radius) * side + (cx - x + radius)]
+                    if v > best:
+                        best, best_y, best_x = v, cy, cx
+        if best >= 0:
+            parents[n], new_ys[n], new_xs[n] = i, best_y, best_x
+            n += 1
+    return parents[:n], new_ys[:n], new_xs[:n]
+
+
+@jit
+def paint_tiles(atlas, tiles, shade, out):
+    """
+    Paint the (n, size, size) atlas indices into the (n, 3, size * t, size * t) images out, the (t, t) tiles
+    darkened by the shade of their cell, saturating at 0. Fuses the gather and the shading of make_obs_batch.
+    """
+    n, size = tiles.shape[0], tiles.shape[1]
+    channels, t = atlas.shape[1], atlas.shape[2]
+    for b in range(n):
+        for y in range(size):
+            for x in range(size):
+                tile = tiles[b, y, x]
+                s = shade[b, y, x]
+                for c in range(channels):
+                    for i in range(t):
+                        for j in range(t):
+                            v = atlas[tile, c, i, j]
+                            out[b, c, y * t + i, x * t + j] = v - s if v > s else 0
+    return out
@@ -0,0 +1,196 @@
+"""
+Array kernels shared by the SrYvl environments.
+
+Grids are batched along the first axis: (n_worlds, side, side).
+Cells are addressed with three parallel index arrays (rows, ys, xs).
+"""
+from functools import lru_cache
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def distances_from_center(side):
+    """
+    Distance of every cell to the center of a side x side map, divided by the distance of the corner (0, 0).
+    Cached per side and shared by every env in the process, so the array is read-only.
+    """
+    center = side // 2
+    d = np.arange(side) - center
+    dist = np.hypot(d[:, None], d[None, :]) / np.hypot(center, center)
+    dist.flags.writeable = False
+    return dist
+
+
+def summed_area_table(grid):
+    """Zero-padded 2D cumulative sum over the last two axes: (n, side + 1, side + 1)."""
+    n, h, w = grid.shape
+    table = np.zeros((n, h + 1, w + 1), dtype=np.int32)
+    np.cumsum(grid, axis=1, out=table[:, 1:, 1:])
+    np.cumsum(table[:, 1:, 1:], axis=2, out=table[:, 1:, 1:])
+    return table
+
+
+def window_sums(table, rows, ys, xs, radius):
+    """Sum of the (2r+1)x(2r+1) window around each cell, clipped at the grid edges."""
+    h = table.shape[1] - 1
+    w = table.shape[2] - 1
+    y0 = np.clip(ys - radius, 0, h)
+    y1 = np.clip(ys + radius + 1, 0, h)
+    x0 = np.clip(xs - radius, 0, w)
+    x1 = np.clip(xs + radius + 1, 0, w)
+    return (
+        table[rows, y1, x1]
+        - table[rows, y0, x1]
+        - table[rows, y1, x0]
+        + table[rows, y0, x0]
+    )
+
+
+def window_offsets(radius):
+    """(dy, dx) of every cell in a (2r+1)x(2r+1) window, row-major."""
+    d = np.arange(-radius, radius + 1)
+    dy, dx = np.meshgrid(d, d, indexing="ij")
+    return dy.ravel(), dx.ravel()
+
+
+def window_cells(ys, xs, radius, shape):
+    """
+    The (2r+1)x(2r+1) window around each given cell, without touching the rest of the grid.
+    Returns the (cy, cx) of shape (len(ys), (2r+1)**2), clipped into the grid, and a mask of the ones inside it.
+    """
+    h, w = shape
+    dy, dx = window_offsets(radius)
+    cy = ys[:, None] + dy
+    cx = xs[:, None] + dx
+    inside = (cy >= 0) & (cy < h) & (cx >= 0) & (cx < w)
+    return np.clip(cy, 0, h - 1), np.clip(cx, 0, w - 1), inside
+
+
+def pick_window_cells(cy, cx, candidates, u):
+    """
+    Pick a uniformly random candidate cell in each window of window_cells.
+
+    u: uniform draws of the windows' shape.
+    Returns the picked (ys, xs) and a mask of the windows that had a candidate.
+    """
+    # argmax over iid uniforms restricted to the candidates is a uniform pick among them.
+    pick = np.argmax(np.where(candidates, u, -1.0), axis=1)
+    k = np.arange(len(cy))
+    return cy[k, pick], cx[k, pick], candidates[k, pick]
+
+
+def sample_window_cells(free, rows, ys, xs, radius, u):
+    """
+    Pick a uniformly random free cell in the window around each given cell.
+
+    u: uniform draws of shape (len(rows), (2r+1)**2).
+    Returns the picked (ys, xs) and a mask of the cells that had a free neighbour.
+    """
+    cy, cx, inside = window_cells(ys, xs, radius, free.shape[1:])
+    return pick_window_cells(cy, cx, inside & free[rows[:, None], cy, cx], u)
+
+
+# (dy, dx) of a cell and of its left, up, right and down neighbours: the moves of actions 1 to 4.
+NEIGHBOURHOOD = np.array([[0, 0], [0, -1], [-1, 0], [0, 1], [1, 0]])
+
+
+def neighbourhood(grid, ys, xs, rows=None):
+    """
+    Values of the grid at each given cell and at its 4 neighbours: (n, 5), in NEIGHBOURHOOD order.
+    grid: (side, side), or (n_worlds, side, side) with the rows of the cells.
+    Gathered through precomputed flat offsets, the cells must not be on the edge of the grid.
+    """
+    h, w = grid.shape[-2:]
+    flat = ys * w + xs
+    if rows is not None:
+        flat = flat + rows * (h * w)
+    return np.ravel(grid).take(flat[:, None] + NEIGHBOURHOOD @ [w, 1])
+
+
+def legal_action_masks(
+    cells,
+    on_food,
+    agent_size,
+    plant_inventory,
+    poison_inventory,
+    walls,
+    obstacles,
+    jump_threshold,
+    max_inventory,
+):
+    """
+    (n, 10) legal action masks of n agents, with the actions of SrYvlLvl0Env as columns.
+
+    cells: (n, 5) categories of the agents' cells and their neighbours, see neighbourhood().
+    on_food: whether there is a food under each agent.
+    walls, obstacles: boolean lookup tables over the categories. Walls can never be entered. Obstacles can only be
+    entered by agents of at least jump_threshold, or by agents already standing on one.
+    """
+    cannot_jump = ~obstacles[cells[:, 0]] & (agent_size < jump_threshold)
+    around = cells[:, 1:]
+    blocked = walls[around] | (obstacles[around] & cannot_jump[:, None])
+
+    masks = np.zeros((len(cells), 10), dtype=np.int64)
+    masks[:, 0] = 1
+    masks[:, 1:5] = ~blocked
+    masks[:, 5] = on_food
+    masks[:, 6] = on_food
+    masks[:, 7] = on_food & (plant_inventory + poison_inventory < max_inventory)
+    masks[:, 8] = ~on_food & (plant_inventory > 0)
+    masks[:, 9] = ~on_food & (plant_inventory <= 0) & (poison_inventory > 0)
+    masks[agent_size <= 0] = 0
+    return masks
+
+
+def sample_masked(masks, u):
+    """
+    A uniformly random allowed column for each row of the (n, k) masks, 0 for rows with nothing allowed.
+    u: n uniform draws, one per row. Picks the floor(u * count)-th allowed column by an integer cumsum.
+    """
+    masks = np.asarray(masks)
+    counts = masks.sum(axis=1)
+    target = (np.reshape(u, -1) * counts).astype(np.int64)
+    picks = (np.cumsum(masks, axis=1) <= target[:, None]).sum(axis=1)
+    return np.where(counts > 0, picks, 0)
+
+
+def shrink_agents(sizes, shrink_rate, moved, active, movement_shrink_penalty):
+    """
+    One frame of shrinking of a batch of agents, in place. Agents that did not move shrink movement_shrink_penalty
+    times faster, the ones that are not active do not shrink.
+    shrink_rate: the size dependent rate of each agent, see SrYvlLvl0Env._get_shrink_rate_movement.
+    """
+    shrink_rate = shrink_rate * np.where(moved, 1, movement_shrink_penalty)
+    sizes -= np.where(active, shrink_rate, 0)
+
+
+def apply_food_actions(
+    sizes,
+    plant_inventory,
+    poison_inventory,
+    eat,
+    store,
+    place_plant,
+    place_poison,
+    poison,
+    food_yield,
+    max_agent_size,
+):
+    """
+    The food actions of a batch of agents, in place on their sizes and inventories.
+
+    eat, store, place_plant, place_poison: masks of the agents doing each action.
+    poison, food_yield: whether the food under each agent is poisonous, and its yield.
+    Eaten poison shrinks the agent by the yield, an eaten plant grows it unless it would exceed max_agent_size.
+    Stored foods go to the inventory of their kind, placed ones leave it.
+    Returns the masks of the agents that grew from a plant and of the ones that ate poison.
+    """
+    grows = eat & ~poison & (sizes + food_yield <= max_agent_size)
+    ate_poison = eat & poison
+    sizes -= np.where(ate_poison, food_yield, 0)
+    sizes += np.where(grows, food_yield, 0)
+    plant_inventory += store & ~poison
+    poison_inventory += store & poison
+    plant_inventory -= place_plant
+    poison_inventory -= place_poison
+    return grows, ate_poison
@@ -0,0 +1,305 @@
+from typing import Tuple
+from gym.spaces import Box
+import numpy as np
+from sryvl.envs.sryvl_v0.assets import make_obs_batch, make_symbolic_batch, flatten_planes
+from sryvl.envs.sryvl_v0.chunks import make_grid
+from sryvl.envs.sryvl_v0.kernels import (
+    neighbourhood,
+    legal_action_masks,
+    sample_masked,
+    shrink_agents,
+    apply_food_actions,
+)
+from sryvl.envs.sryvl_v0.env import (
+    SrYvlLvl0Env,
+    AgentHistory,
+    FoodStore,
+    NOTHING,
+    FOOD,
+    BOUNDARY,
+    POISON,
+    ACTION_EAT,
+    ACTION_KILL,
+    ACTION_STORE,
+    ACTION_PLACE_PLANT,
+    ACTION_PLACE_POISON,
+    OFFSETS,
+    WALLS,
+    OBSTACLES,
+)
+
+
+class PopulationHistory(AgentHistory):
+    """
+    AgentHistory of n_agents at once.
+
+    The agents' planes are stacked along the first axis of one (n_agents * side, side) grid, so the cells of
+    different agents never collide and a whole population is updated with one scatter.
+    """
+
+    def __init__(self, side, maxlen, n_agents, chunk_size=None):
+        self.side = side
+        self.maxlen = maxlen
+        self.n_agents = n_agents
+        self.positions = np.zeros((maxlen, n_agents, 2), dtype=np.int64)
+        self.sizes = np.zeros((maxlen, n_agents))
+        self.plane = make_grid((n_agents * side, side), 0.0, np.float64, chunk_size)
+        self._counts = make_grid((n_agents * side, side), 0, np.int64, chunk_size)
+        self._offsets = np.arange(n_agents) * side
+        self._n_appended = 0
+
+    def append(self, positions, sizes):
+        head = self._n_appended % self.maxlen
+        if self._n_appended >= self.maxlen:
+            cells = self._cells(self.positions[head])
+            counts = self._counts[cells] - 1
+            self._counts[cells] = counts
+            # Reset instead of subtracting so that float round off doesn't pile up in visited cells.
+            self.plane[cells] = np.where(counts > 0, self.plane[cells] - self.sizes[head], 0.0)
+
+        cells = self._cells(positions)
+        self.positions[head] = positions
+        self.sizes[head] = sizes
+        self._counts[cells] = self._counts[cells] + 1
+        self.plane[cells] = self.plane[cells] + sizes
+        self._n_appended += 1
+
+    def windows(self, ys, xs):
+        """Planes of every agent at the given (n_agents, ...) broadcastable cells."""
+        return self.plane[self._offsets[:, None, None] + ys, xs]
+
+    def _entry_cells(self, n):
+        stacked = self.positions[:n] + np.stack([self._offsets, np.zeros_like(self._offsets)], axis=1)
+        return stacked.reshape(-1, 2)
+
+    def _cells(self, positions):
+        return self._offsets + positions[:, 0], positions[:, 1]
+
+
+class SrYvlMultiAgentEnv(SrYvlLvl0Env):
+    """
+    n_agents agents living in one SrYvl world.
+
+    The ecology (food expiry, growth and drawing the world) is simulated once per tick for all the agents.
+    Everything per agent is an array with a leading n_agents axis: agent_position (n_agents, 2), agent_size,
+    the inventories, legal_actions (n_agents, 10) and done. step() takes one action per agent and returns
+    batched observations, rewards and dones. The episode is over once every agent is done.
+
+    Agents can share a cell. When several agents eat, kill or store the same food, or place a food in the same
+    cell in one tick, the one with the lowest index gets it and the others' actions are noops.
+    Observations show the other agents' sizes in the health plane.
+    """
+
+    def __init__(self, n_agents=4, **kwargs):
+        """kwargs: the parameters of SrYvlLvl0Env."""
+        self.n_agents = n_agents
+        super().__init__(**kwargs)
+
+    @property
+    def all_done(self) -> bool:
+        return bool(self.done.all())
+
+    def make_observation_space(self, mode) -> Box:
+        """Space of one agent's observation, with a leading n_agents axis."""
+        space = super().make_observation_space(mode)
+        shape = (self.n_agents, *space.shape)
+        return Box(low=np.broadcast_to(space.low, shape), high=np.broadcast_to(space.high, shape), dtype=space.dtype)
+
+    def render(self, mode="human", out=None):
+        if mode in ("human", "ansi", "terminal"):
+            return super().render(mode)
+
+        assert mode in self.metadata["render_modes"]
+        planes = self._observe_planes()
+        if mode == "flattened_planes":
+            return flatten_planes(planes, self.plane_dtype, self._plane_scales, out=out)
+        if mode == "symbolic":
+            return make_symbolic_batch(
+                planes, self.plant_inventory, self.poison_inventory, self._plane_scales, self.cell_pixels, out=out
+            )
+        # mode == 'rgb_array':
+        return make_obs_batch(planes, self.plant_inventory, self.poison_inventory, self.size_threshold_to_jump, out=out)
+
+    def step(self, actions, out=None, observe=True) -> Tuple[np.array, np.array, np.array, dict]:
+        """
+        actions: one action per agent. The actions of agents that are done are ignored.
+
+        Like SrYvlLvl0Env.step, the actions are repeated for frame_skip frames. Agents that are done stop at their
+        last frame, and the rewards are summed over the frames. Returns the batched observations, the rewards and
+        the dones of every agent.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.zeros(self.n_agents)
+        active = ~self.done
+        for _ in range(self.frame_skip):
+            self._advance(actions, active)
+            rewards -= self.done & active
+            active = ~self.done
+            if not active.any():
+                break
+
+        obs, info = self._finish_step(self.all_done, out, observe)
+        return obs, rewards, self.done.copy(), info
+
+    def _advance(self, actions, active):
+        """One tick of the world: every active agent acts, then the ecology moves on once."""
+        stats = self.stats_agg
+        profiler = self.profiler
+        profiler.start()
+        agents = np.arange(self.n_agents)
+        if stats.enabled:
+            for action in actions[active].tolist():
+                stats.record("actions", action)
+        self.agent_history.append(self.agent_position, np.where(active, self.agent_size, 0))
+
+        # Illegal action == Noop, and the agents that are done sit out.
+        actions = np.where((self.legal_actions[agents, actions] == 0) | ~active, 0, actions)
+
+        offsets = OFFSETS[actions]
+        self.agent_position += offsets
+        y = self.agent_position[:, 0]
+        x = self.agent_position[:, 1]
+        cell_ids = y * len(self.world) + x
+
+        # ----- HEALTH -----
+        moved = (offsets != 0).any(axis=1)
+        shrink_agents(self.agent_size, self._get_shrink_rate_movement(), moved, active, self.movement_shrink_penalty)
+
+        slots = self.foods.cells[y, x]
+        takes = self._first_per_cell(
+            (slots != FoodStore.EMPTY) & np.isin(actions, (ACTION_EAT, ACTION_KILL, ACTION_STORE)), cell_ids
+        )
+        poison = self.foods.is_poison[slots] & takes
+        places = self._first_per_cell(np.isin(actions, (ACTION_PLACE_PLANT, ACTION_PLACE_POISON)), cell_ids)
+        place_poison = places & (actions == ACTION_PLACE_POISON)
+
+        eat = takes & (actions == ACTION_EAT)
+        grows, ate_poison = apply_food_actions(
+            self.agent_size,
+            self.plant_inventory,
+            self.poison_inventory,
+            eat,
+            takes & (actions == ACTION_STORE),
+            places & ~place_poison,
+            place_poison,
+            poison,
+            self._get_food_yield(self.foods.age[slots]),
+            self.max_agent_size,
+        )
+        stats.count("poison_eaten", int(ate_poison.sum()))
+        stats.count("food_eaten", int(grows.sum()))
+        killed_poison = bool((poison & (actions == ACTION_KILL)).any())
+
+        # ----- FOODS ------
+        self.foods.remove(slots[takes])
+        self.foods.add_many(self.agent_position[places], self.food_expiry_period, place_poison[places])
+        self._draw_cells(self.agent_position[takes | places])
+        profiler.lap("movement")
+
+        # ----- ECOLOGY -----
+        self.foods.step()
+        profiler.lap("food_aging")
+        self._clear_expired_foods()
+        profiler.lap("clear_expired")
+        self._grow_more_food()
+        profiler.lap("grow_food")
+
+        self.legal_actions = self._find_legal_actions()
+        self.done = self.legal_actions.sum(axis=1) == 0
+        profiler.lap("legal_actions")
+
+        stats.count("steps")
+        if stats.enabled:
+            if active.any():
+                stats.record("health", float(self.agent_size[active].mean()))
+            stats.record("has_eaten_food", bool(eat.any()))
+            stats.record("has_killed_poison", killed_poison)
+        profiler.lap("stats")
+
+    @staticmethod
+    def _first_per_cell(mask, cell_ids):
+        """Keep only the lowest agent index of the mask in each cell."""
+        candidates = np.flatnonzero(mask)
+        _, first = np.unique(cell_ids[candidates], return_index=True)
+        kept = np.zeros_like(mask)
+        kept[candidates[first]] = True
+        return kept
+
+    def reward(self) -> np.array:
+        return -self.done.astype(np.float64)
+
+    def sample_action(self):
+        """A random legal action per agent, noop for the agents that are done."""
+        return sample_masked(self.legal_actions, self.np_random.random(self.n_agents))
+
+    def _reset_agents(self, side):
+        k = self.n_agents
+        self.agent_size = np.ones(k)
+        available = np.array((self.world == NOTHING).nonzero()).T
+        assert len(available) >= k, f"n_agents={k} is more than the {len(available)} free cells of the world"
+        self.agent_position = available[self.np_random.choice(len(available), size=k, replace=False)]
+        self.plant_inventory = np.zeros(k, dtype=np.int64)
+        self.poison_inventory = np.zeros(k, dtype=np.int64)
+        self.legal_actions = self._find_legal_actions()
+        self.done = np.zeros(k, dtype=bool)
+        self.agent_history = PopulationHistory(side, self.world_size, k, chunk_size=self.chunk_size)
+        if self._planes.ndim != 4:
+            self._planes = np.zeros((k, *self._planes.shape))
+
+    def _get_agent_state(self):
+        agents = np.column_stack(
+            [self.agent_position, self.plant_inventory, self.poison_inventory, self.done]
+        ).astype(np.int64)
+        return agents, self.agent_size.copy(), self.agent_history.get_state()
+
+    def _set_agent_state(self, state, side):
+        agents, agent_size, history = state
+        self.agent_size = agent_size.copy()
+        self.agent_position = agents[:, :2].copy()
+        self.plant_inventory = agents[:, 2].copy()
+        self.poison_inventory = agents[:, 3].copy()
+        self.done = agents[:, 4].astype(bool)
+
+        if self.agent_history.side != side:
+            self.agent_history = PopulationHistory(side, self.world_size, self.n_agents, chunk_size=self.chunk_size)
+        self.agent_history.set_state(*history)
+
+    def _observe_planes(self):
+        """The planes of SrYvlLvl0Env._observe_planes for every agent, gathered in one pass."""
+        r = self.observation_radius
+        d = np.arange(-r, r + 1)
+        ys = (self.agent_position[:, 0, None] + d)[:, :, None]
+        xs = (self.agent_position[:, 1, None] + d)[:, None, :]
+
+        planes = self._planes
+        planes[:, 0] = self.world[ys, xs] == BOUNDARY
+        planes[:, 1] = self._terrain_map[ys, xs]
+        self._observe_food_ages(self.foods.cells[ys, xs], out=planes[:, 2:4].swapaxes(0, 1))
+
+        # The other living agents in each window, then each agent at the center of its own.
+        planes[:, 4] = 0
+        dy, dx = (self.agent_position[None, :] - self.agent_position[:, None] + r).transpose(2, 0, 1)
+        seen = (dy >= 0) & (dy <= 2 * r) & (dx >= 0) & (dx <= 2 * r) & (self.agent_size > 0)[None, :]
+        observers, others = seen.nonzero()
+        np.maximum.at(planes[:, 4], (observers, dy[seen], dx[seen]), self.agent_size[others])
+        planes[:, 4, r, r] = self.agent_size
+
+        planes[:, 5] = self._distances_from_center[ys, xs]
+        planes[:, 6] = self.agent_history.windows(ys, xs)
+        return planes
+
+    def _find_legal_actions(self):
+        """Batched SrYvlLvl0Env._find_legal_actions, one row per agent."""
+        cells = neighbourhood(self.world, self.agent_position[:, 0], self.agent_position[:, 1])
+        on_food = (cells[:, 0] == FOOD) | (cells[:, 0] == POISON)
+        return legal_action_masks(
+            cells,
+            on_food,
+            self.agent_size,
+            self.plant_inventory,
+            self.poison_inventory,
+            WALLS,
+            OBSTACLES,
+            self.size_threshold_to_jump,
+            self.max_inventory,
+        )
@@ -0,0 +1,146 @@
+"""
+Episodes stored as (env class, constructor params, seed, actions) and replayed on demand.
+
+Every random draw of a SrYvl env comes from its np_random, seeded by reset(seed=...). Replaying the actions on an
+env built with the same params and reset with the same seed rebuilds every state and observation exactly.
+An action takes 1 byte per step (per agent) instead of a 3x63x63 frame.
+
+Usage:
+    recorder = EpisodeRecorder(dict(world_size=40))
+    recorder.reset(seed=0)
+    while not recorder.env.done:
+        recorder.step(recorder.sample_action())
+    recorder.record.save("episode.npz")
+
+    replay = EpisodeReplayer(EpisodeRecord.load("episode.npz"))
+    frame = replay.observation_at(1234)
+"""
+import json
+import numpy as np
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.kernels import sample_masked
+from sryvl.envs.sryvl_v0.multi_env import SrYvlMultiAgentEnv
+
+ENV_CLASSES = {cls.__name__: cls for cls in (SrYvlLvl0Env, SrYvlMultiAgentEnv)}
+
+
+class EpisodeRecord:
+    """One episode: the env class name, its constructor params, the reset seed and the actions of every step()."""
+
+    def __init__(self, env_name, params, seed, actions=()):
+        self.env_name = env_name
+        self.params = params
+        self.seed = seed
+        self.actions = list(actions)
+
+    def __len__(self):
+        return len(self.actions)
+
+    def make_env(self):
+        return ENV_CLASSES[self.env_name](**self.params)
+
+    def save(self, path):
+        meta = {"env": self.env_name, "params": self.params, "seed": self.seed}
+        np.savez_compressed(path, meta=np.array(json.dumps(meta)), actions=np.array(self.actions, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            actions = data["actions"]
+        return cls(meta["env"], meta["params"], meta["seed"], actions)
+
+
+class EpisodeRecorder:
+    """
+    Steps an env and records what is needed to replay it.
+
+    Take random actions from sample_action() here rather than from env.sample_action(): the env's draws come from
+    its np_random, so they would be missing from the replay.
+    """
+
+    def __init__(self, params=None, env_class=SrYvlLvl0Env):
+        """params: keyword arguments of env_class. They are stored as json, a world_bank is stored as its path."""
+        self.params = {name: _to_json(value) for name, value in (params or {}).items()}
+        self.env_name = env_class.__name__
+        self.env = env_class(**self.params)
+        self.record = None
+        self.records = []
+        self.rng = np.random.default_rng()
+
+    def reset(self, seed=None):
+        """Start a new record. Without a seed, one is drawn so that the episode can still be replayed."""
+        if seed is None:
+            seed = int(np.random.SeedSequence().generate_state(1, np.uint64)[0] >> 1)
+        self.rng = np.random.default_rng(seed)
+        self.record = EpisodeRecord(self.env_name, self.params, seed)
+        self.records.append(self.record)
+        return self.env.reset(seed=seed)
+
+    def step(self, action, **kwargs):
+        """kwargs: passed to env.step(), e.g. out or observe."""
+        assert self.record is not None, "Call reset(seed) before step(), to start a record"
+        # A plain int for a single agent, as its env looks actions up in dicts, a uint8 row for a population.
+        self.record.actions.append(int(action) if np.ndim(action) == 0 else np.array(action, dtype=np.uint8))
+        return self.env.step(action, **kwargs)
+
+    def sample_action(self):
+        """A random legal action (per agent), drawn from the recorder's own generator."""
+        masks = np.atleast_2d(self.env.legal_actions)
+        actions = sample_masked(masks, self.rng.random(len(masks)))
+        return actions if np.ndim(self.env.legal_actions) == 2 else int(actions[0])
+
+
+class EpisodeReplayer:
+    """
+    Random access to the states and observations of a recorded episode.
+
+    States are regenerated by stepping the recorded actions without rendering. Every checkpoint_every steps,
+    a get_state() snapshot is kept, so reaching any step costs at most checkpoint_every steps after the first visit.
+    """
+
+    def __init__(self, record: EpisodeRecord, checkpoint_every=100):
+        self.record = record
+        self.checkpoint_every = checkpoint_every
+        self.env = record.make_env()
+        self.env.reset(seed=record.seed)
+        self.step_index = 0
+        self._checkpoints = {0: self.env.get_state()}
+
+    def __len__(self):
+        """Number of recorded steps. The states go from 0 (after reset) to len(self)."""
+        return len(self.record)
+
+    def seek(self, step):
+        """Bring env to its state after the given number of steps and return it."""
+        assert 0 <= step <= len(self), f"Step {step} is out of the episode's 0..{len(self)}"
+        if not self.step_index <= step < self.step_index + self.checkpoint_every:
+            start = max(i for i in self._checkpoints if i <= step)
+            if not start <= self.step_index <= step:
+                self.env.set_state(self._checkpoints[start])
+                self.step_index = start
+
+        actions = self.record.actions
+        while self.step_index < step:
+            self.env.step(actions[self.step_index], observe=False)
+            self.step_index += 1
+            if self.step_index % self.checkpoint_every == 0:
+                self._checkpoints.setdefault(self.step_index, self.env.get_state())
+        return self.env
+
+    def state_at(self, step) -> bytes:
+        """get_state() snapshot after the given number of steps."""
+        return self.seek(step).get_state()
+
+    def observation_at(self, step, mode=None, out=None):
+        """The observation after the given number of steps, rendered in mode (the env's observation_mode by default)."""
+        env = self.seek(step)
+        return env.render(mode or env.observation_mode, out=out)
+
+
+def _to_json(value):
+    if isinstance(value, np.dtype) or (isinstance(value, type) and issubclass(value, np.generic)):
+        return np.dtype(value).name
+    if hasattr(value, "path"):  # WorldBank
+        return value.path
+    return value
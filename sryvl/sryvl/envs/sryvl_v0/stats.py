@@ -0,0 +1,172 @@
+import time
+import numpy as np
+
+STATS_OFF = "off"
+STATS_COUNTERS = "counters"
+STATS_FULL = "full"
+STATS_LEVELS = (STATS_OFF, STATS_COUNTERS, STATS_FULL)
+
+COUNTERS = ("steps", "food_eaten", "poison_eaten")
+
+# Per-step series and their dtypes. Kept as ring buffers of the last steps with the full level.
+SERIES = {
+    "actions": np.int64,
+    "n_foods_available": np.int64,
+    "n_foods_expired": np.int64,
+    "n_foods_generated": np.int64,
+    "has_eaten_food": bool,
+    "has_killed_poison": bool,
+    "health": np.float64,
+}
+
+# Series that are summed over the episode with the counters level.
+TOTALS = ("n_foods_expired", "n_foods_generated", "has_eaten_food", "has_killed_poison")
+
+
+class RingBuffer:
+    """The last maxlen values appended, in a preallocated numpy array."""
+
+    def __init__(self, maxlen, dtype=np.float64):
+        self.buffer = np.zeros(maxlen, dtype=dtype)
+        self.maxlen = maxlen
+        self._n_appended = 0
+
+    def __len__(self):
+        return min(self._n_appended, self.maxlen)
+
+    def __getitem__(self, item):
+        return self.values()[item]
+
+    def __iter__(self):
+        return iter(self.values())
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values() if dtype is None else self.values().astype(dtype)
+
+    def append(self, value):
+        self.buffer[self._n_appended % self.maxlen] = value
+        self._n_appended += 1
+
+    def values(self):
+        """Oldest first."""
+        if self._n_appended <= self.maxlen:
+            return self.buffer[: self._n_appended].copy()
+        head = self._n_appended % self.maxlen
+        return np.concatenate([self.buffer[head:], self.buffer[:head]])
+
+
+class EpisodeStats:
+    """
+    Diagnostics of one episode, collected at one of the STATS_LEVELS:
+    - off: nothing is recorded
+    - counters: COUNTERS, the episode totals of TOTALS and the last value of every series
+    - full: counters, plus ring buffers of the last max_buffer values of every series
+
+    Indexing reads a counter, or a series' ring buffer with the full level.
+    """
+
+    def __init__(self, level=STATS_FULL, max_buffer=500):
+        assert level in STATS_LEVELS, f"stats level must be one of {STATS_LEVELS}"
+        self.level = level
+        self.enabled = level != STATS_OFF
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.totals = dict.fromkeys(TOTALS, 0)
+        self.last = {}
+        self.series = {}
+        if level == STATS_FULL:
+            self.series = {name: RingBuffer(max_buffer, dtype) for name, dtype in SERIES.items()}
+
+    def __getitem__(self, name):
+        if name in self.counters:
+            return self.counters[name]
+        return self.series[name]
+
+    def __repr__(self):
+        return f"EpisodeStats({self.summary()})"
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def record(self, name, value):
+        if not self.enabled:
+            return
+        if name in self.totals:
+            self.totals[name] += value
+        self.last[name] = value
+        if self.series:
+            self.series[name].append(value)
+
+    def summary(self) -> dict:
+        """Plain dict of the episode's diagnostics. Empty with the off level."""
+        if not self.enabled:
+            return {}
+        summary = dict(self.counters)
+        summary.update({f"total_{name}": value for name, value in self.totals.items()})
+        summary.update({f"last_{name}": np.asarray(value).item() for name, value in self.last.items()})
+        if self.series:
+            health = self.series["health"].values()
+            if len(health):
+                summary["mean_health"] = float(health.mean())
+                summary["min_health"] = float(health.min())
+            summary["action_counts"] = np.bincount(self.series["actions"].values(), minlength=10).tolist()
+        return summary
+
+
+class StepProfiler:
+    """
+    Wall time of each phase of step(), timed as laps: start() begins a step, lap(phase) ends the phase that ran
+    since the previous lap. Per phase, it keeps a count, a total and a histogram of power of 2 nanosecond buckets:
+    bucket b counts the laps that took [2 ** (b - 1), 2 ** b) ns.
+
+    Disabled, start and lap return right away. Plain python counters keep an enabled lap around a microsecond.
+    """
+
+    N_BUCKETS = 40
+
+    def __init__(self, phases, enabled=True):
+        self.phases = tuple(phases)
+        self.enabled = enabled
+        self._index = {phase: i for i, phase in enumerate(self.phases)}
+        self._last = 0
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * len(self.phases)
+        self.totals = [0] * len(self.phases)
+        self.histograms = [[0] * self.N_BUCKETS for _ in self.phases]
+
+    def start(self):
+        if self.enabled:
+            self._last = time.perf_counter_ns()
+
+    def lap(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        elapsed = now - self._last
+        self._last = now
+        i = self._index[phase]
+        self.counts[i] += 1
+        self.totals[i] += elapsed
+        self.histograms[i][min(elapsed.bit_length(), self.N_BUCKETS - 1)] += 1
+
+    def report(self) -> dict:
+        """Per phase: count, total and mean time, share of the total, p50 and p99 (bucket upper bounds), histogram."""
+        total = sum(self.totals) or 1
+        report = {}
+        for i, phase in enumerate(self.phases):
+            count = self.counts[i]
+            histogram = np.array(self.histograms[i])
+            cumulative = np.cumsum(histogram)
+            p50, p99 = np.searchsorted(cumulative, [0.5 * count, 0.99 * count]) if count else (0, 0)
+            report[phase] = {
+                "count": count,
+                "total_s": self.totals[i] / 1e9,
+                "mean_us": self.totals[i] / max(count, 1) / 1e3,
+                "share": self.totals[i] / total,
+                "p50_us": 2.0 ** p50 / 1e3,
+                "p99_us": 2.0 ** p99 / 1e3,
+                "histogram_ns": {2**b: int(n) for b, n in enumerate(histogram) if n},
+            }
+        return report
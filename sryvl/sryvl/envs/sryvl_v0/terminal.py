@@ -0,0 +1,64 @@
+"""
+Text rendering of SrYvl worlds.
+
+Frames are (side, side) category grids (NOTHING, AGENT, FOOD, TERRAIN, BOUNDARY, POISON), looked up in GLYPHS.
+Every cell takes CELL_WIDTH terminal columns, so that the grid stays aligned around the wide glyphs.
+"""
+import sys
+import unicodedata
+import numpy as np
+
+# Glyph of each category, indexed by its value.
+GLYPHS = np.array(
+    [
+        " ",  # Nothing
+        "🔺",  # Player
+        "•",  # Food
+        "■",  # Terrain
+        "□",  # Boundary
+        "◦",  # Poison
+    ]
+)
+
+# Terminal columns taken by each glyph: 2 for the East Asian wide ones, like the player's emoji, 1 otherwise.
+GLYPH_WIDTHS = np.array([2 if unicodedata.east_asian_width(g) in "WF" else 1 for g in GLYPHS])
+CELL_WIDTH = int(GLYPH_WIDTHS.max()) + 1
+# Each glyph followed by the spaces that pad it to CELL_WIDTH columns.
+CELLS = np.array([g + " " * (CELL_WIDTH - w) for g, w in zip(GLYPHS, GLYPH_WIDTHS)])
+
+
+def ansi_string(frame) -> str:
+    """The frame as rows of glyphs, each padded with spaces to CELL_WIDTH columns."""
+    return "\n".join(map("".join, CELLS[frame].tolist()))
+
+
+class TerminalView:
+    """
+    Draws frames on an ANSI terminal, rewriting only the cells that changed since the previous frame.
+
+    The first frame, or one of a new shape, clears the screen and is drawn whole. A status line goes below the world.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = sys.stdout if stream is None else stream
+        self._last = None
+
+    def draw(self, frame, status=""):
+        frame = np.asarray(frame)
+        if self._last is None or self._last.shape != frame.shape:
+            text = "\x1b[2J\x1b[H" + ansi_string(frame)
+        else:
+            ys, xs = (frame != self._last).nonzero()
+            cells = CELLS[frame[ys, xs]].tolist()
+            # The padding of a cell also erases what a wider glyph left there. Escape codes count from 1.
+            text = "".join(
+                f"\x1b[{y + 1};{CELL_WIDTH * x + 1}H{c}" for y, x, c in zip(ys.tolist(), xs.tolist(), cells)
+            )
+        text += f"\x1b[{len(frame) + 1};1H\x1b[K{status}"
+        self.stream.write(text)
+        self.stream.flush()
+        self._last = frame.copy()
+
+    def reset(self):
+        """Redraw the whole screen on the next frame."""
+        self._last = None
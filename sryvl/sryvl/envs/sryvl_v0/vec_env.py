@@ -0,0 +1,530 @@
+from typing import Tuple
+from gym.spaces import Discrete, Box
+from gym.utils import seeding
+from gym.vector import VectorEnv
+import numpy as np
+from sryvl.envs.sryvl_v0.assets import (
+    make_obs_batch,
+    make_symbolic_batch,
+    flatten_planes,
+    plane_scales,
+    PLANE_DTYPES,
+    SYMBOLIC_CHANNELS,
+)
+from sryvl.envs.sryvl_v0.env import (
+    SrYvlLvl0Env,
+    NOTHING,
+    FOOD,
+    TERRAIN,
+    BOUNDARY,
+    POISON,
+    ACTION_EAT,
+    ACTION_KILL,
+    ACTION_STORE,
+    ACTION_PLACE_PLANT,
+    ACTION_PLACE_POISON,
+    OFFSETS,
+    WALLS,
+    OBSTACLES,
+)
+from sryvl.envs.sryvl_v0.jit import NUMBA_ENABLED, grow_food_picks
+from sryvl.envs.sryvl_v0.kernels import (
+    summed_area_table,
+    window_sums,
+    sample_window_cells,
+    neighbourhood,
+    legal_action_masks,
+    sample_masked,
+    shrink_agents,
+    apply_food_actions,
+)
+from sryvl.envs.sryvl_v0.world_bank import WorldBank, WORLD_PARAMS
+
+NO_FOOD = -1
+
+# Parameters that can differ between the rows: one value for every row, or a sequence of num_envs values.
+ROW_PARAMS = (
+    "food_growth_density",
+    "growth_rate_min",
+    "growth_rate_max",
+    "shrink_rate_min",
+    "shrink_rate_max",
+    "terrain_intensity",
+    "poison_fraction",
+)
+
+
+class SrYvlVecEnv(VectorEnv):
+    """
+    N independent SrYvl worlds stepped together as stacked arrays.
+
+    Every row follows the rules of SrYvlLvl0Env. The state lives in:
+    - world: (N, side, side) uint8 categories, as drawn by SrYvlLvl0Env.draw_env
+    - food_age: (N, side, side) age of the food in each cell, NO_FOOD if empty
+    - food_poison: (N, side, side) whether the food in each cell is poisonous
+    - agent_position (N, 2), agent_size (N,) and the inventories (N,)
+
+    Rows that are done are reset automatically at the end of step().
+    The agent history is a ring buffer of the last world_size steps.
+
+    The ROW_PARAMS are (N,) arrays, so that rows with different parameters, e.g. of a curriculum or of
+    domain randomization, are stepped together. See set_row_params().
+    """
+
+    metadata = {"render_modes": ["rgb_array", "flattened_planes", "symbolic"]}
+
+    def __init__(
+        self,
+        num_envs=256,
+        world_size=20,
+        max_agent_size=2,
+        food_growth_density=3,
+        food_growth_radius=2,
+        food_expiry_period=50,
+        initial_food_density=0.2,
+        poison_fraction=0.5,
+        growth_rate_min=0.05,
+        growth_rate_max=0.1,
+        shrink_rate_min=0.009,
+        shrink_rate_max=0.01,
+        movement_shrink_penalty=1.05,
+        observation_radius=3,
+        size_threshold_to_jump=1.0,
+        terrain_resolution=8,
+        terrain_intensity=0.8,
+        max_inventory=5,
+        observation_mode="rgb_array",
+        world_bank=None,
+        plane_dtype=np.float64,
+        cell_pixels=1,
+        frame_skip=1,
+    ):
+        """
+        observation_mode: render mode of the observations: "rgb_array", "flattened_planes" or "symbolic".
+        world_bank: optional WorldBank, or path to one, to sample the initial worlds from instead of generating them.
+        plane_dtype: dtype of the flattened_planes observations. One of PLANE_DTYPES, uint8 is quantized.
+        cell_pixels: side of the block of pixels of each cell in the symbolic mode.
+        frame_skip: number of frames each step() repeats the actions for.
+
+        The ROW_PARAMS take a value for all the rows or a sequence with the value of each row.
+        """
+        assert observation_mode in self.metadata["render_modes"]
+
+        self.world_size = world_size
+        self.max_agent_size = max_agent_size
+        self.food_growth_density = food_growth_density
+        self.food_growth_radius = food_growth_radius
+        self.food_expiry_period = food_expiry_period
+        self.initial_food_density = initial_food_density
+        self.poison_fraction = poison_fraction
+        self.growth_rate_min = growth_rate_min
+        self.growth_rate_max = growth_rate_max
+        self.shrink_rate_min = shrink_rate_min
+        self.shrink_rate_max = shrink_rate_max
+        self.movement_shrink_penalty = movement_shrink_penalty
+        self.observation_radius = observation_radius
+        self.size_threshold_to_jump = size_threshold_to_jump
+        self.terrain_resolution = terrain_resolution
+        self.terrain_intensity = terrain_intensity
+        self.max_inventory = max_inventory
+        self.observation_mode = observation_mode
+        self.cell_pixels = cell_pixels
+        self.frame_skip = frame_skip
+        assert np.dtype(plane_dtype) in PLANE_DTYPES, f"plane_dtype must be one of {PLANE_DTYPES}"
+        self.plane_dtype = np.dtype(plane_dtype)
+        self._plane_scales = plane_scales(max_agent_size, world_size)
+        for name in ROW_PARAMS:
+            values = np.asarray(getattr(self, name), dtype=np.float64)
+            setattr(self, name, np.broadcast_to(values, (num_envs,)).copy())
+
+        if isinstance(world_bank, str):
+            world_bank = WorldBank(world_bank)
+        if world_bank is not None:
+            world_bank.check_params(**{name: getattr(self, name) for name in WORLD_PARAMS})
+        self.world_bank = world_bank
+
+        n = num_envs
+        side = world_size + observation_radius * 2
+        self.side = side
+
+        window = observation_radius * 2 + 1
+        if observation_mode == "rgb_array":
+            observation_space = Box(low=0, high=255, shape=(3, window * 9, window * 9), dtype=np.uint8)
+        elif observation_mode == "symbolic":
+            shape = (len(SYMBOLIC_CHANNELS), window * cell_pixels, window * cell_pixels)
+            observation_space = Box(low=0, high=255, shape=shape, dtype=np.uint8)
+        else:
+            high = 255 if self.plane_dtype == np.uint8 else np.inf
+            observation_space = Box(low=0, high=high, shape=(7 * window * window,), dtype=self.plane_dtype)
+        super().__init__(n, observation_space, Discrete(10))
+
+        self.world = np.zeros((n, side, side), dtype=np.uint8)
+        self.static = np.zeros((n, side, side), dtype=np.uint8)
+        self.terrain = np.zeros((n, side, side), dtype=bool)
+        self.food_age = np.full((n, side, side), NO_FOOD, dtype=np.int32)
+        self.food_poison = np.zeros((n, side, side), dtype=bool)
+
+        self.agent_position = np.zeros((n, 2), dtype=np.int64)
+        self.agent_size = np.ones(n)
+        self.plant_inventory = np.zeros(n, dtype=np.int64)
+        self.poison_inventory = np.zeros(n, dtype=np.int64)
+        self.legal_actions = np.ones((n, 10), dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+
+        self.history = np.zeros((n, side, side))
+        self._history_counts = np.zeros((n, side, side), dtype=np.int64)
+        self._history_positions = np.zeros((n, world_size, 2), dtype=np.int64)
+        self._history_sizes = np.zeros((n, world_size))
+        self._history_length = 0
+
+        self._rows = np.arange(n)
+        self._distances_from_center = SrYvlLvl0Env._get_distances_from_center(side)
+
+        self.reset()
+
+    def reset(self, *_args, seed=None, **_kwargs) -> np.array:
+        """seed: seeds self.np_random, the generator behind every random draw of the batch."""
+        if seed is not None:
+            self._np_random, _ = seeding.np_random(seed)
+        self._reset_rows(self._rows)
+        return self.observe()
+
+    def step(self, actions, out=None, observe=True) -> Tuple[np.array, np.array, np.array, dict]:
+        """
+        Repeat the actions for frame_skip frames. Rows that are done stop at their last frame, and the rewards
+        are summed over the frames. The world is redrawn and the observations rendered once, after the last frame.
+
+        out: optional preallocated buffer for the batch of observations, see observe().
+        observe: when False, nothing is rendered: the observations are None, and so are the final_observation entries.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+        rewards = np.zeros(self.num_envs)
+        active = ~self.done
+        for _ in range(self.frame_skip):
+            self._advance(actions, active)
+            rewards -= self.done & active
+            active = ~self.done
+            if not active.any():
+                break
+
+        self.draw_env()
+        dones = self.done.copy()
+        obs = self.observe(out=out) if observe else None
+        infos = {}
+        if dones.any():
+            done_rows = rows[dones]
+            # Like gym's vector envs: one entry per row, the last observation of the done rows and None elsewhere.
+            final_observation = np.full(self.num_envs, None, dtype=object)
+            if observe:
+                for i in done_rows:
+                    final_observation[i] = obs[i].copy()
+            infos["final_observation"] = final_observation
+            infos["_final_observation"] = dones
+            self._reset_rows(done_rows)
+            if observe:
+                obs[done_rows] = self._observe(done_rows)
+
+        return obs, rewards, dones, infos
+
+    def observe(self, out=None) -> np.array:
+        """out: optional preallocated buffer with the shape and dtype of the batched observation_space."""
+        return self._observe(self._rows, out=out)
+
+    def _advance(self, actions, active):
+        """One frame of the game for the active rows."""
+        rows = self._rows
+
+        self._push_history(active)
+
+        # Illegal action == Noop, and the rows that are done sit out the remaining frames.
+        actions = np.where((self.legal_actions[rows, actions] == 0) | ~active, 0, actions)
+
+        offsets = OFFSETS[actions]
+        self.agent_position += offsets
+        y = self.agent_position[:, 0]
+        x = self.agent_position[:, 1]
+
+        # ----- HEALTH -----
+        moved = (offsets != 0).any(axis=1)
+        shrink_agents(self.agent_size, self._get_shrink_rate_movement(), moved, active, self.movement_shrink_penalty)
+
+        age_under_agent = self.food_age[rows, y, x]
+        poison_under_agent = self.food_poison[rows, y, x]
+
+        eat = actions == ACTION_EAT
+        store = actions == ACTION_STORE
+        place_plant = actions == ACTION_PLACE_PLANT
+        place_poison = actions == ACTION_PLACE_POISON
+        apply_food_actions(
+            self.agent_size,
+            self.plant_inventory,
+            self.poison_inventory,
+            eat,
+            store,
+            place_plant,
+            place_poison,
+            poison_under_agent,
+            self._get_food_yield(age_under_agent),
+            self.max_agent_size,
+        )
+
+        # ----- FOODS ------
+        removed = eat | store | (actions == ACTION_KILL)
+        self.food_age[rows[removed], y[removed], x[removed]] = NO_FOOD
+
+        placed = place_plant | place_poison
+        self.food_age[rows[placed], y[placed], x[placed]] = 0
+        self.food_poison[rows[placed], y[placed], x[placed]] = place_poison[placed]
+
+        has_food = (self.food_age != NO_FOOD) & active[:, None, None]
+        self.food_age[has_food] += 1
+        self.food_age[self.food_age >= self.food_expiry_period] = NO_FOOD
+        self._grow_more_food(active)
+
+        self.legal_actions = self._find_legal_actions()
+        self.done = self.legal_actions.sum(axis=1) == 0
+
+    def set_row_params(self, rows, **params):
+        """
+        Change ROW_PARAMS of the given rows, e.g. to move them along a curriculum. Each value is a scalar or one
+        value per row. The rules use the new values from the next step, the world generation (terrain_intensity
+        and poison_fraction) from the next reset of the rows.
+        Nothing changes if a name or a value is rejected.
+        """
+        values = {}
+        for name, value in params.items():
+            assert name in ROW_PARAMS, f"{name} is not one of the per-row parameters {ROW_PARAMS}"
+            values[name] = getattr(self, name).copy()
+            values[name][rows] = value
+        if self.world_bank is not None:
+            self.world_bank.check_params(**{name: values.get(name, getattr(self, name)) for name in WORLD_PARAMS})
+        for name, value in values.items():
+            getattr(self, name)[:] = value
+
+    def sample_action(self):
+        assert self.legal_actions.any(axis=1).all(), "No legal actions"
+        return sample_masked(self.legal_actions, self.np_random.random(self.num_envs))
+
+    def draw_env(self):
+        food = np.where(self.food_poison, POISON, FOOD).astype(np.uint8)
+        food[self.food_age == NO_FOOD] = NOTHING
+        np.copyto(self.world, np.where(self.static != NOTHING, self.static, food))
+
+    def _observe(self, rows, out=None):
+        planes = self._observe_planes(rows)
+        if self.observation_mode == "flattened_planes":
+            return flatten_planes(planes, self.plane_dtype, self._plane_scales, out=out)
+        if self.observation_mode == "symbolic":
+            return make_symbolic_batch(
+                planes,
+                self.plant_inventory[rows],
+                self.poison_inventory[rows],
+                self._plane_scales,
+                self.cell_pixels,
+                out=out,
+            )
+        return make_obs_batch(
+            planes,
+            self.plant_inventory[rows],
+            self.poison_inventory[rows],
+            self.size_threshold_to_jump,
+            out=out,
+        )
+
+    def _observe_planes(self, rows):
+        """
+        planes:
+        0: Boundary
+        1: Terrain
+        2: Food Ages
+        3: Poison Ages
+        4: Player Health
+        5: Dist b/w center of the map to each point
+        6: Previous path of the player health
+        """
+        r = self.observation_radius
+        d = np.arange(-r, r + 1)
+        ys = (self.agent_position[rows, 0, None] + d)[:, :, None]
+        xs = (self.agent_position[rows, 1, None] + d)[:, None, :]
+        sizes = self.agent_size[rows]
+        rows = rows[:, None, None]
+
+        age = self.food_age[rows, ys, xs]
+        poison = self.food_poison[rows, ys, xs]
+        ages = np.where(age == NO_FOOD, 0, age) / self.food_expiry_period
+
+        planes = np.zeros((len(sizes), 7, 2 * r + 1, 2 * r + 1))
+        planes[:, 0] = self.static[rows, ys, xs] == BOUNDARY
+        planes[:, 1] = self.terrain[rows, ys, xs]
+        planes[:, 2] = np.where(poison, 0, ages)
+        planes[:, 3] = np.where(poison, ages, 0)
+        planes[:, 4, r, r] = sizes
+        planes[:, 5] = self._distances_from_center[ys, xs]
+        planes[:, 6] = self.history[rows, ys, xs]
+        return planes
+
+    def _grow_more_food(self, active):
+        rows, ys, xs = ((self.food_age != NO_FOOD) & active[:, None, None]).nonzero()
+        if len(rows) == 0:
+            return
+
+        ages = self.food_age[rows, ys, xs]
+        # Older plants will have higher probability of growing more plants
+        chance = ages / (self.food_expiry_period**1.5) > self.np_random.random(len(rows))
+        rows, ys, xs = rows[chance], ys[chance], xs[chance]
+        # The uniforms picking the new cells, only for the foods that may grow.
+        window = (2 * self.food_growth_radius + 1) ** 2
+        u = self.np_random.random((len(rows), window))
+
+        if NUMBA_ENABLED:
+            grown, new_ys, new_xs = grow_food_picks(
+                rows, ys, xs, u, self.food_growth_radius, self.food_growth_density,
+                self.food_age, NO_FOOD, self.static, NOTHING,
+            )
+            rows, ys, xs = rows[grown], ys[grown], xs[grown]
+            found = np.ones(len(grown), dtype=bool)
+        else:
+            # Cannot grow more than the set density
+            table = summed_area_table(self.food_age != NO_FOOD)
+            num_food = window_sums(table, rows, ys, xs, self.food_growth_radius) - 1
+            growing = num_food < self.food_growth_density[rows]
+            rows, ys, xs, u = rows[growing], ys[growing], xs[growing], u[growing]
+
+            free = (self.static == NOTHING) & (self.food_age == NO_FOOD)
+            new_ys, new_xs, found = sample_window_cells(free, rows, ys, xs, self.food_growth_radius, u)
+
+        self.food_age[rows[found], new_ys[found], new_xs[found]] = 0
+        self.food_poison[rows[found], new_ys[found], new_xs[found]] = self.food_poison[
+            rows[found], ys[found], xs[found]
+        ]
+
+    def _find_legal_actions(self):
+        """
+        Batched SrYvlLvl0Env._find_legal_actions.
+        Reads the static layer and the foods rather than self.world, so it doesn't need a draw_env() first.
+        """
+        rows = self._rows
+        y = self.agent_position[:, 0]
+        x = self.agent_position[:, 1]
+        cells = neighbourhood(self.static, y, x, rows)
+        # The static layer covers the foods, like in draw_env.
+        on_food = (cells[:, 0] == NOTHING) & (self.food_age[rows, y, x] != NO_FOOD)
+        return legal_action_masks(
+            cells,
+            on_food,
+            self.agent_size,
+            self.plant_inventory,
+            self.poison_inventory,
+            WALLS,
+            OBSTACLES,
+            self.size_threshold_to_jump,
+            self.max_inventory,
+        )
+
+    def _push_history(self, active):
+        """
+        Add the current position to the history ring buffer, dropping the oldest entry once full.
+        Inactive rows keep their history plane as is, they are reset at the end of the step.
+        """
+        rows = self._rows
+        head = self._history_length % self.world_size
+        if self._history_length >= self.world_size:
+            r = rows[active]
+            y, x = self._history_positions[r, head].T
+            self._history_counts[r, y, x] -= 1
+            # Reset instead of subtracting so that float round off doesn't pile up in visited cells.
+            left = self.history[r, y, x] - self._history_sizes[r, head]
+            self.history[r, y, x] = np.where(self._history_counts[r, y, x] > 0, left, 0.0)
+        sizes = np.where(active, self.agent_size, 0)
+        y, x = self.agent_position.T
+        self._history_counts[rows, y, x] += active
+        self.history[rows, y, x] += sizes
+        self._history_positions[:, head] = self.agent_position
+        self._history_sizes[:, head] = sizes
+        self._history_length += 1
+
+    def _reset_rows(self, rows):
+        if self.world_bank is None:
+            self._generate_rows(rows)
+        else:
+            self._load_rows(rows)
+
+        # Agents start on a random empty cell.
+        empty = (self.static[rows] == NOTHING) & (self.food_age[rows] == NO_FOOD)
+        empty = empty.reshape(len(rows), -1)
+        cell = np.argmax(np.where(empty, self.np_random.random(empty.shape), -1.0), axis=1)
+        self.agent_position[rows] = np.stack(np.divmod(cell, self.side), axis=1)
+
+        self.agent_size[rows] = 1
+        self.plant_inventory[rows] = 0
+        self.poison_inventory[rows] = 0
+        self.done[rows] = False
+        self._clear_history(rows)
+
+        self.draw_env()
+        self.legal_actions = self._find_legal_actions()
+
+    def _generate_rows(self, rows):
+        side = self.side
+        for i in rows:
+            world = np.zeros((side, side), dtype=np.uint8)
+            food_positions = SrYvlLvl0Env.get_initial_food_positions(
+                side, self.initial_food_density, rng=self.np_random
+            )
+            SrYvlLvl0Env.fill_indices(world, food_positions, FOOD)
+
+            terrain = SrYvlLvl0Env.make_terrain(
+                side, self.terrain_resolution, self.terrain_intensity[i], rng=self.np_random
+            )
+            self.terrain[i] = False
+            self.terrain[i][tuple(terrain.T)] = True
+            world[self.terrain[i]] = TERRAIN
+
+            boundary = SrYvlLvl0Env.make_boundary(side, self.observation_radius)
+            world[tuple(boundary.T)] = BOUNDARY
+
+            self.static[i] = np.where(world == FOOD, NOTHING, world)
+
+            foods = world == FOOD
+            n_foods = foods.sum()
+            self.food_age[i] = NO_FOOD
+            self.food_age[i][foods] = self.np_random.integers(self.food_expiry_period, size=n_foods)
+            self.food_poison[i] = False
+            self.food_poison[i][foods] = self.np_random.random(n_foods) < self.poison_fraction[i]
+
+    def _load_rows(self, rows):
+        """Copy random initial worlds of the world bank into the given rows."""
+        indices = np.sort(self.world_bank.sample(len(rows), rng=self.np_random))
+        static, terrain, food_rows, positions, poison, age = self.world_bank.get_batch(indices)
+        self.static[rows] = static
+        self.terrain[rows] = terrain
+        self.food_age[rows] = NO_FOOD
+        self.food_poison[rows] = False
+        cells = rows[food_rows], positions[:, 0], positions[:, 1]
+        self.food_age[cells] = age
+        self.food_poison[cells] = poison
+
+    def _clear_history(self, rows):
+        """
+        Zero the history of the reset rows. Their ring buffer entries move to the agent's cell with a size of 0,
+        so they subtract nothing when they leave. The entries that will leave are counted in that cell.
+        """
+        self.history[rows] = 0
+        self._history_counts[rows] = 0
+        self._history_sizes[rows] = 0
+        self._history_positions[rows] = self.agent_position[rows, None]
+        y, x = self.agent_position[rows].T
+        self._history_counts[rows, y, x] = min(self._history_length, self.world_size)
+
+    def _get_shrink_rate_movement(self):
+        """Linearly increasing function b/w min and max. x axis = agent_size."""
+        return (
+            self.shrink_rate_max - self.shrink_rate_min
+        ) / self.max_agent_size * self.agent_size + self.shrink_rate_min
+
+    def _get_food_yield(self, food_age):
+        """Linearly increasing function b/w min and max. x axis = food age."""
+        return (
+            self.growth_rate_max - self.growth_rate_min
+        ) / self.food_expiry_period * food_age + self.growth_rate_min
@@ -0,0 +1,92 @@
+"""
+Pre-generated initial SrYvl worlds, stored on disk and read through memory maps.
+
+A bank is a directory with:
+- static.npy: (n, side, side) uint8 static layer of each world (TERRAIN and BOUNDARY cells), copied as is on reset
+- terrain.npy: (n, side, side) bool terrain mask (terrain also lies under the boundary)
+- food_offsets.npy: (n + 1,) the foods of world i are the entries food_offsets[i]:food_offsets[i + 1] of:
+- food_positions.npy: (n_foods, 2) uint16 cell of each food, row-major within a world
+- food_poison.npy: (n_foods,) bool whether each food is poisonous
+- food_age.npy: (n_foods,) initial age of each food
+- meta.json: the env parameters the worlds were generated with
+
+Usage:
+    python -m sryvl.envs.sryvl_v0.generate_world_bank banks/default --n-worlds 10000
+    env = SrYvlLvl0Env(world_bank="banks/default")
+"""
+import json
+import os
+import numpy as np
+
+# Parameters that decide what an initial world looks like.
+WORLD_PARAMS = (
+    "world_size",
+    "observation_radius",
+    "initial_food_density",
+    "poison_fraction",
+    "food_expiry_period",
+    "terrain_resolution",
+    "terrain_intensity",
+)
+
+
+class WorldBank:
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        # Memory mapped: every process reading the bank shares the same page cache pages.
+        self.static = np.load(os.path.join(path, "static.npy"), mmap_mode="r")
+        self.terrain = np.load(os.path.join(path, "terrain.npy"), mmap_mode="r")
+        self.food_offsets = np.load(os.path.join(path, "food_offsets.npy"))
+        self.food_positions = np.load(os.path.join(path, "food_positions.npy"), mmap_mode="r")
+        self.food_poison = np.load(os.path.join(path, "food_poison.npy"), mmap_mode="r")
+        self.food_age = np.load(os.path.join(path, "food_age.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.static)
+
+    @property
+    def side(self):
+        return self.static.shape[1]
+
+    def check_params(self, **params):
+        """Assert the bank was generated with the given env parameters, or that all the values of an array are."""
+        for name, value in params.items():
+            assert np.all(np.asarray(value) == self.meta[name]), (
+                f"World bank {self.path} has {name}={self.meta[name]}, not {value}"
+            )
+
+    def sample(self, n=None, rng=None):
+        """Random world index, or n of them."""
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.integers(len(self), size=n)
+
+    def get(self, index):
+        """(static, terrain, food_positions, food_poison, food_age) of one world."""
+        foods = slice(self.food_offsets[index], self.food_offsets[index + 1])
+        return (
+            self.static[index],
+            self.terrain[index],
+            self.food_positions[foods],
+            self.food_poison[foods],
+            self.food_age[foods],
+        )
+
+    def get_batch(self, indices):
+        """
+        (static, terrain, food_rows, food_positions, food_poison, food_age) of a batch of worlds.
+        The foods of all the worlds are concatenated, food_rows is the position in indices of the world of each food.
+        """
+        starts = self.food_offsets[indices]
+        counts = self.food_offsets[np.asarray(indices) + 1] - starts
+        food_rows = np.repeat(np.arange(len(counts)), counts)
+        foods = np.arange(counts.sum()) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        return (
+            self.static[indices],
+            self.terrain[indices],
+            food_rows,
+            self.food_positions[foods],
+            self.food_poison[foods],
+            self.food_age[foods],
+        )
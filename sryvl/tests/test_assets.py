@@ -0,0 +1,68 @@
+from sryvl.envs.sryvl_v0.assets import (
+    agent,
+    build_cell,
+    make_symbolic,
+    plane_scales,
+    tile_atlas,
+    tile_indices,
+    SKIN,
+    SYMBOLIC_CHANNELS,
+)
+
+import unittest
+import numpy as np
+
+
+class TestAgentSkin(unittest.TestCase):
+
+    def skin_pixels(self, cell):
+        ys, xs = np.array([[y, x] for y, x, color in agent if color == SKIN]).T
+        return cell[:, ys, xs].T
+
+    def atlas_skin(self, energy_level, jumper_threshold):
+        window = np.zeros((1, 7, 1, 1))
+        window[0, 4] = energy_level
+        tile = tile_atlas(jumper_threshold)[tile_indices(window, 0, 0, jumper_threshold)][0, 0, 0]
+        return self.skin_pixels(tile).astype(int)
+
+    def test_skin_around_thresholds(self):
+        for jumper_threshold in (1.0, 1.5, 1.3, 1.01):
+            for energy_level in (0.9, 0.98, 0.99, 1.0, 1.005, 1.01, 1.2, 1.29, 1.3, 1.31, 1.49, 1.5, 1.51, 1.99, 2.0):
+                with self.subTest(energy_level=energy_level, jumper_threshold=jumper_threshold):
+                    expected = self.skin_pixels(build_cell(agent, energy_level, jumper_threshold))
+                    skin = self.atlas_skin(energy_level, jumper_threshold)
+                    # The jump cue: full green once the agent can jump.
+                    np.testing.assert_array_equal(skin[:, 1] == 255, expected[:, 1] == 255)
+                    np.testing.assert_allclose(skin, expected, atol=10)
+
+    def test_skin_at_jumps_is_exact(self):
+        for jumper_threshold in (1.0, 1.5, 1.3):
+            for energy_level in (1.0, jumper_threshold):
+                expected = self.skin_pixels(build_cell(agent, energy_level, jumper_threshold))
+                np.testing.assert_array_equal(self.atlas_skin(energy_level, jumper_threshold), expected)
+
+
+class TestHandFlags(unittest.TestCase):
+
+    def setUp(self):
+        # The observing agent at the center of the window and another one in a corner.
+        self.window = np.zeros((7, 5, 5))
+        self.window[4, 2, 2] = 1.0
+        self.window[4, 0, 0] = 1.0
+
+    def test_tiles_of_other_agents_have_empty_hands(self):
+        tiles = tile_indices(self.window[None], 1, 1, 1.5)[0]
+        self.assertNotEqual(tiles[2, 2], tiles[0, 0])
+        self.assertEqual(tiles[0, 0], tile_indices(self.window[None], 0, 0, 1.5)[0, 0, 0])
+
+    def test_symbolic_flags_only_on_the_observer(self):
+        symbolic = make_symbolic(self.window, 1, 1, plane_scales(2.0, 10))
+        flags = symbolic[len(SYMBOLIC_CHANNELS) - 2 :]
+        expected = np.zeros((5, 5), dtype=np.uint8)
+        expected[2, 2] = 255
+        for flag in flags:
+            np.testing.assert_array_equal(flag, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+from sryvl.envs.sryvl_v0.benchmark import compare, run_benchmark, RENDER_MODES
+
+import copy
+import unittest
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.results = run_benchmark(
+            world_sizes=(10,), food_densities=(0.1,), observation_radii=(1, 2), verbose=False,
+            n_steps=5, n_resets=1, n_renders=1,
+        )
+
+    def test_results(self):
+        self.assertEqual(set(self.results), {"meta", "results"})
+        self.assertEqual(len(self.results["results"]), 2)
+        for result in self.results["results"]:
+            self.assertEqual(set(result), {"params", "steps_per_sec", "reset_ms", "render_ms", "peak_mb"})
+            self.assertEqual(set(result["render_ms"]), set(RENDER_MODES))
+            for metric in ("steps_per_sec", "reset_ms", "peak_mb"):
+                self.assertIsInstance(result[metric], float)
+                self.assertGreater(result[metric], 0)
+
+    def test_compare(self):
+        self.assertEqual(compare(self.results, self.results), [])
+
+        baseline = copy.deepcopy(self.results)
+        faster = baseline["results"][0]
+        faster["steps_per_sec"] *= 2
+        faster["render_ms"]["ansi"] /= 2
+        regressions = compare(baseline, self.results)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(isinstance(line, str) for line in regressions))
+        self.assertIn("steps_per_sec", regressions[0])
+        self.assertIn("render_ms.ansi", regressions[1])
+        # Within the tolerance, nothing is reported.
+        self.assertEqual(compare(baseline, self.results, tolerance=2.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+from sryvl.envs.sryvl_v0 import assets, env as env_module
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.kernels import sample_masked
+from sryvl.envs.sryvl_v0.multi_env import SrYvlMultiAgentEnv
+
+import unittest
+from unittest import mock
+import numpy as np
+
+
+class TestStateRoundTrip(unittest.TestCase):
+
+    def assert_round_trips(self, env, copy, n_steps=300):
+        for _ in range(n_steps):
+            env.step(env.sample_action(), observe=False)
+            if np.all(env.done):
+                env.reset()
+            copy.set_state(env.get_state())
+            np.testing.assert_array_equal(copy.render("flattened_planes"), env.render("flattened_planes"))
+            np.testing.assert_array_equal(copy.world, env.world)
+
+    def test_single_agent(self):
+        env = SrYvlLvl0Env(observation_mode="flattened_planes")
+        env.reset(seed=0)
+        self.assert_round_trips(env, SrYvlLvl0Env(observation_mode="flattened_planes"))
+
+    def test_single_agent_chunked(self):
+        env = SrYvlLvl0Env(observation_mode="flattened_planes", chunk_size=8)
+        env.reset(seed=0)
+        self.assert_round_trips(env, SrYvlLvl0Env(observation_mode="flattened_planes", chunk_size=8))
+
+    def test_multi_agent(self):
+        env = SrYvlMultiAgentEnv(n_agents=3, observation_mode="flattened_planes")
+        env.reset(seed=0)
+        self.assert_round_trips(env, SrYvlMultiAgentEnv(n_agents=3, observation_mode="flattened_planes"))
+
+    def test_steps_after_set_state(self):
+        env = SrYvlLvl0Env()
+        env.reset(seed=1)
+        for _ in range(20):
+            env.step(env.sample_action())
+        copy = SrYvlLvl0Env()
+        copy.set_state(env.get_state())
+        for _ in range(100):
+            if env.done:
+                break
+            action = env.sample_action()
+            self.assertEqual(copy.sample_action(), action)
+            obs, reward, done, _ = env.step(action)
+            copy_obs, copy_reward, copy_done, _ = copy.step(action)
+            np.testing.assert_array_equal(copy_obs, obs)
+            self.assertEqual((copy_reward, copy_done), (reward, done))
+
+
+class TestEquivalentRuns(unittest.TestCase):
+    """Configurations that must not change the rollout of a seed."""
+
+    def rollout(self, n_steps=300, **params):
+        env = SrYvlLvl0Env(world_size=40, **params)
+        env.reset(seed=5)
+        frames = []
+        for _ in range(n_steps):
+            obs, reward, done, _ = env.step(env.sample_action())
+            frames.append((obs, env.world.copy(), reward))
+            if done:
+                env.reset()
+        return frames
+
+    def assert_same_rollouts(self, frames, other_frames):
+        self.assertEqual(len(frames), len(other_frames))
+        for (obs, world, reward), (other_obs, other_world, other_reward) in zip(frames, other_frames):
+            np.testing.assert_array_equal(other_world, world)
+            np.testing.assert_array_equal(other_obs, obs)
+            self.assertEqual(other_reward, reward)
+
+    def test_dense_and_chunked(self):
+        self.assert_same_rollouts(self.rollout(), self.rollout(chunk_size=8))
+
+    def test_numpy_and_kernel_paths(self):
+        # The kernels run as plain python without Numba, enabling them here still takes their code paths.
+        numpy_frames = self.rollout()
+        with mock.patch.object(env_module, "NUMBA_ENABLED", True), mock.patch.object(assets, "NUMBA_ENABLED", True):
+            self.assert_same_rollouts(numpy_frames, self.rollout())
+
+
+class CountingEnv(SrYvlLvl0Env):
+    """A reward of 1 per frame, so that the reward of a step counts the frames it ran."""
+
+    def reward(self) -> float:
+        return 1.0
+
+
+class TestFrameSkip(unittest.TestCase):
+    """A step with frame_skip=k runs like k steps of the same action with frame_skip=1, up to the first done."""
+
+    def test_frames_match_single_steps(self):
+        env = CountingEnv(world_size=20, frame_skip=4, observation_mode="flattened_planes")
+        env.reset(seed=2)
+        single = CountingEnv(world_size=20, observation_mode="flattened_planes")
+        single.reset(seed=2)
+        rng = np.random.default_rng(0)
+
+        n_steps = 0
+        while not env.done:
+            action = int(sample_masked(env.legal_actions[None], rng.random(1))[0])
+            obs, reward, done, info = env.step(action)
+            n_frames = 0
+            for _ in range(4):
+                single_obs, _, single_done, _ = single.step(action)
+                n_frames += 1
+                if single_done:
+                    break
+            # Rewards are summed over the frames, and a done ends the step early.
+            self.assertEqual(reward, n_frames)
+            self.assertEqual(done, single_done)
+            self.assertEqual(env.stats_agg["steps"], single.stats_agg["steps"])
+            np.testing.assert_array_equal(obs, single_obs)
+            np.testing.assert_array_equal(env.world, single.world)
+            n_steps += 1
+        self.assertLess(n_frames, 4, "the episode should end in the middle of a step")
+        self.assertIn("episode", info)
+        self.assertGreater(n_steps, 10)
+
+
+class TestOutputBuffers(unittest.TestCase):
+    """Observations written into out= buffers are returned in them, with the values rendered without one."""
+
+    CONFIGS = [
+        dict(observation_mode="rgb_array"),
+        dict(observation_mode="flattened_planes"),
+        dict(observation_mode="flattened_planes", plane_dtype=np.float32),
+        dict(observation_mode="flattened_planes", plane_dtype=np.uint8),
+        dict(observation_mode="symbolic", cell_pixels=2),
+    ]
+
+    def assert_written(self, env, render):
+        space = env.observation_space
+        out = np.full(space.shape, 7, dtype=space.dtype)
+        obs = render(out)
+        self.assertTrue(np.shares_memory(obs, out))
+        np.testing.assert_array_equal(obs, env.observe())
+
+    def check_env(self, env_class, **params):
+        for config in self.CONFIGS:
+            with self.subTest(**config):
+                env = env_class(world_size=20, **config, **params)
+                env.reset(seed=0)
+                for _ in range(10):
+                    self.assert_written(env, lambda out: env.step(env.sample_action(), out=out)[0])
+                self.assert_written(env, lambda out: env.observe(out=out))
+                self.assert_written(env, lambda out: env.render(config["observation_mode"], out=out))
+
+    def test_single_agent(self):
+        self.check_env(SrYvlLvl0Env)
+
+    def test_multi_agent(self):
+        self.check_env(SrYvlMultiAgentEnv, n_agents=3)
+
+
+class TestMultiAgentStats(unittest.TestCase):
+
+    def test_action_counts(self):
+        env = SrYvlMultiAgentEnv(n_agents=3)
+        env.reset(seed=0)
+        for _ in range(20):
+            env.step(env.sample_action(), observe=False)
+        counts = env.stats_agg.summary()["action_counts"]
+        self.assertEqual(sum(counts), len(env.stats_agg["actions"]))
+        self.assertGreater(sum(counts), 20)
+
+
+class TestProfile(unittest.TestCase):
+
+    def assert_report_counts_every_observe(self, env):
+        env.reset(seed=0)
+        n_steps = 0
+        info = {}
+        while "profile" not in info:
+            _, _, _, info = env.step(env.sample_action())
+            n_steps += 1
+        self.assertEqual(info["profile"]["observe"]["count"], n_steps)
+        self.assertEqual(info["profile"]["movement"]["count"], n_steps)
+
+    def test_single_agent(self):
+        self.assert_report_counts_every_observe(SrYvlLvl0Env(world_size=20, profile=True))
+
+    def test_multi_agent(self):
+        self.assert_report_counts_every_observe(SrYvlMultiAgentEnv(n_agents=2, world_size=20, profile=True))
+
+
+class TestMultiAgentReset(unittest.TestCase):
+
+    def test_more_agents_than_free_cells(self):
+        with self.assertRaisesRegex(AssertionError, "n_agents=1000 is more than the"):
+            SrYvlMultiAgentEnv(n_agents=1000, world_size=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
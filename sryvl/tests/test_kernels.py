@@ -0,0 +1,81 @@
+from sryvl.envs.sryvl_v0.jit import grow_food_picks
+from sryvl.envs.sryvl_v0.kernels import (
+    pick_window_cells,
+    sample_masked,
+    sample_window_cells,
+    summed_area_table,
+    window_cells,
+    window_sums,
+)
+
+import unittest
+import numpy as np
+
+NO_FOOD = -1
+NOTHING = 0
+
+
+class TestGrowFoodPicks(unittest.TestCase):
+    """The growth kernel against the NumPy paths of the vec and the single agent env, on the same uniforms."""
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.radius = 2
+        self.food = np.where(rng.random((4, 12, 12)) < 0.3, rng.integers(10, size=(4, 12, 12)), NO_FOOD)
+        self.ground = np.where(rng.random((4, 12, 12)) < 0.2, 3, NOTHING).astype(np.uint8)
+        self.density = np.array([0, 2, 3, 25])
+        self.rows, self.ys, self.xs = (self.food != NO_FOOD).nonzero()
+        self.u = rng.random((len(self.rows), (2 * self.radius + 1) ** 2))
+
+    def kernel_picks(self):
+        grown, ys, xs = grow_food_picks(
+            self.rows, self.ys, self.xs, self.u, self.radius, self.density, self.food, NO_FOOD, self.ground, NOTHING
+        )
+        self.assertGreater(len(grown), 0)
+        return grown, ys, xs
+
+    def test_vec_path(self):
+        table = summed_area_table(self.food != NO_FOOD)
+        num_food = window_sums(table, self.rows, self.ys, self.xs, self.radius) - 1
+        growing = np.flatnonzero(num_food < self.density[self.rows])
+        free = (self.ground == NOTHING) & (self.food == NO_FOOD)
+        ys, xs, found = sample_window_cells(
+            free, self.rows[growing], self.ys[growing], self.xs[growing], self.radius, self.u[growing]
+        )
+
+        grown, kernel_ys, kernel_xs = self.kernel_picks()
+        np.testing.assert_array_equal(grown, growing[found])
+        np.testing.assert_array_equal(kernel_ys, ys[found])
+        np.testing.assert_array_equal(kernel_xs, xs[found])
+
+    def test_single_agent_path(self):
+        for row in range(len(self.food)):
+            with self.subTest(row=row):
+                mine = np.flatnonzero(self.rows == row)
+                food, ground = self.food[row], self.ground[row]
+                cy, cx, inside = window_cells(self.ys[mine], self.xs[mine], self.radius, food.shape)
+                num_food = (inside & (food[cy, cx] != NO_FOOD)).sum(axis=1) - 1
+                growing = num_food < self.density[row]
+                free = inside[growing] & (ground[cy, cx][growing] == NOTHING) & (food[cy, cx][growing] == NO_FOOD)
+                ys, xs, found = pick_window_cells(cy[growing], cx[growing], free, self.u[mine][growing])
+
+                grown, kernel_ys, kernel_xs = self.kernel_picks()
+                in_row = self.rows[grown] == row
+                np.testing.assert_array_equal(grown[in_row], mine[growing][found])
+                np.testing.assert_array_equal(kernel_ys[in_row], ys[found])
+                np.testing.assert_array_equal(kernel_xs[in_row], xs[found])
+
+
+class TestSampleMasked(unittest.TestCase):
+
+    def test_picks_allowed_columns_uniformly(self):
+        masks = np.array([[0, 1, 1, 0, 1], [0, 0, 0, 0, 0], [1, 0, 0, 0, 0]])
+        u = np.linspace(0, 1, 300, endpoint=False)
+        picks = np.array([sample_masked(masks, np.full(3, v)) for v in u])
+        np.testing.assert_array_equal(np.bincount(picks[:, 0], minlength=5), [0, 100, 100, 0, 100])
+        np.testing.assert_array_equal(picks[:, 1], 0)
+        np.testing.assert_array_equal(picks[:, 2], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+from sryvl.envs.sryvl_v0.multi_env import SrYvlMultiAgentEnv
+from sryvl.envs.sryvl_v0.recorder import EpisodeRecord, EpisodeRecorder, EpisodeReplayer
+
+import os
+import tempfile
+import unittest
+import numpy as np
+
+
+class TestEpisodeReplay(unittest.TestCase):
+
+    def record_episode(self, recorder, n_steps=150):
+        recorder.reset(seed=3)
+        observations = [recorder.env.render("flattened_planes")]
+        for _ in range(n_steps):
+            recorder.step(recorder.sample_action())
+            observations.append(recorder.env.render("flattened_planes"))
+            if np.all(recorder.env.done):
+                break
+        return observations
+
+    def assert_replays(self, record, observations):
+        replay = EpisodeReplayer(record, checkpoint_every=20)
+        self.assertEqual(len(replay), len(observations) - 1)
+        for step in (len(replay), 0, 7, 40, 39, len(replay) // 2):
+            np.testing.assert_array_equal(replay.observation_at(step, "flattened_planes"), observations[step])
+
+    def test_in_memory_single_agent(self):
+        recorder = EpisodeRecorder(dict(world_size=20))
+        observations = self.record_episode(recorder)
+        self.assert_replays(recorder.record, observations)
+
+    def test_in_memory_multi_agent(self):
+        recorder = EpisodeRecorder(dict(world_size=20, n_agents=3), env_class=SrYvlMultiAgentEnv)
+        observations = self.record_episode(recorder)
+        self.assert_replays(recorder.record, observations)
+
+    def test_saved(self):
+        recorder = EpisodeRecorder(dict(world_size=20))
+        observations = self.record_episode(recorder)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "episode.npz")
+            recorder.record.save(path)
+            self.assert_replays(EpisodeRecord.load(path), observations)
+
+    def test_step_before_reset(self):
+        recorder = EpisodeRecorder(dict(world_size=20))
+        with self.assertRaisesRegex(AssertionError, "reset"):
+            recorder.step(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
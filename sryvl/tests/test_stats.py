@@ -0,0 +1,87 @@
+from sryvl.envs.sryvl_v0.stats import EpisodeStats, RingBuffer, StepProfiler
+
+import unittest
+import numpy as np
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = RingBuffer(4, dtype=np.int64)
+
+    def test_before_wrapping(self):
+        for value in (3, 1, 2):
+            self.buffer.append(value)
+        self.assertEqual(len(self.buffer), 3)
+        np.testing.assert_array_equal(self.buffer.values(), [3, 1, 2])
+
+    def test_keeps_the_last_values_oldest_first(self):
+        for value in range(11):
+            self.buffer.append(value)
+        self.assertEqual(len(self.buffer), 4)
+        np.testing.assert_array_equal(self.buffer.values(), [7, 8, 9, 10])
+        np.testing.assert_array_equal(np.asarray(self.buffer), [7, 8, 9, 10])
+        self.assertEqual(self.buffer[-1], 10)
+        self.assertEqual(list(self.buffer), [7, 8, 9, 10])
+
+    def test_values_are_a_copy(self):
+        self.buffer.append(1)
+        self.buffer.values()[0] = 5
+        self.assertEqual(self.buffer[0], 1)
+
+
+class TestEpisodeStats(unittest.TestCase):
+
+    def record_steps(self, stats):
+        for action, health in [(1, 1.0), (5, 0.5), (5, 2.0)]:
+            stats.count("steps")
+            stats.record("actions", action)
+            stats.record("health", health)
+            stats.record("has_eaten_food", action == 5)
+
+    def test_full(self):
+        stats = EpisodeStats(max_buffer=2)
+        self.record_steps(stats)
+        summary = stats.summary()
+        self.assertEqual(summary["steps"], 3)
+        self.assertEqual(summary["total_has_eaten_food"], 2)
+        self.assertEqual(summary["last_health"], 2.0)
+        # The series only keep the last max_buffer steps.
+        self.assertEqual(summary["min_health"], 0.5)
+        self.assertEqual(summary["action_counts"], [0, 0, 0, 0, 0, 2, 0, 0, 0, 0])
+
+    def test_counters(self):
+        stats = EpisodeStats("counters")
+        self.record_steps(stats)
+        summary = stats.summary()
+        self.assertEqual(summary["steps"], 3)
+        self.assertEqual(summary["last_actions"], 5)
+        self.assertNotIn("action_counts", summary)
+
+    def test_off(self):
+        stats = EpisodeStats("off")
+        self.record_steps(stats)
+        self.assertEqual(stats.summary(), {})
+
+
+class TestStepProfiler(unittest.TestCase):
+
+    def test_laps(self):
+        profiler = StepProfiler(("a", "b"))
+        for _ in range(3):
+            profiler.start()
+            profiler.lap("a")
+            profiler.lap("b")
+        report = profiler.report()
+        self.assertEqual([report[phase]["count"] for phase in ("a", "b")], [3, 3])
+        self.assertAlmostEqual(report["a"]["share"] + report["b"]["share"], 1.0)
+
+    def test_disabled(self):
+        profiler = StepProfiler(("a",), enabled=False)
+        profiler.start()
+        profiler.lap("a")
+        self.assertEqual(profiler.report()["a"]["count"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+from sryvl.envs.sryvl_v0.terminal import TerminalView, ansi_string, GLYPHS
+
+import io
+import re
+import unicodedata
+import unittest
+import numpy as np
+
+ESCAPE = re.compile(r"\x1b\[(\d*);?(\d*)([HJK])")
+
+
+class Screen:
+    """
+    A character grid that replays the escape codes TerminalView writes: clear, cursor moves and erase line.
+    East Asian wide characters take two columns, overwriting half of one blanks its other half as terminals do.
+    """
+
+    def __init__(self, rows=40, cols=80):
+        self.grid = [[" "] * cols for _ in range(rows)]
+        self.y = self.x = 0
+
+    def feed(self, text):
+        i = 0
+        while i < len(text):
+            match = ESCAPE.match(text, i)
+            if match:
+                self.escape(*match.groups())
+                i = match.end()
+            elif text[i] == "\n":
+                self.y, self.x = self.y + 1, 0
+                i += 1
+            else:
+                self.put(text[i])
+                i += 1
+
+    def escape(self, a, b, command):
+        if command == "H":
+            self.y, self.x = int(a or 1) - 1, int(b or 1) - 1
+        elif command == "J":
+            self.grid = [[" "] * len(row) for row in self.grid]
+        else:
+            self.grid[self.y][self.x :] = [" "] * (len(self.grid[self.y]) - self.x)
+
+    def put(self, char):
+        row = self.grid[self.y]
+        width = 2 if unicodedata.east_asian_width(char) in "WF" else 1
+        for x in range(self.x, self.x + width):
+            if row[x] is None:
+                row[x - 1] = " "
+            elif x + 1 < len(row) and row[x + 1] is None:
+                row[x + 1] = " "
+        row[self.x] = char
+        if width == 2:
+            row[self.x + 1] = None
+        self.x += width
+
+    def lines(self, n):
+        return ["".join(c for c in row if c is not None).rstrip() for row in self.grid[:n]]
+
+
+class TestTerminalView(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.view = TerminalView(self.stream)
+        self.screen = Screen()
+
+    def assert_shows(self, frame):
+        self.screen.feed(self.stream.getvalue())
+        self.stream.seek(0)
+        self.stream.truncate()
+        expected = Screen()
+        expected.feed(ansi_string(frame))
+        self.assertEqual(self.screen.lines(len(frame)), expected.lines(len(frame)))
+
+    def test_agent_walks_between_foods(self):
+        frame = np.full((8, 3), 2)
+        frame[0] = 4
+        for y in [*range(1, 8), *range(6, 0, -1)]:
+            frame[y, 1] = 1
+            self.view.draw(frame)
+            self.assert_shows(frame)
+            frame[y, 1] = 0
+
+    def test_random_frames(self):
+        rng = np.random.default_rng(0)
+        frame = rng.integers(len(GLYPHS), size=(6, 6))
+        for _ in range(50):
+            changed = rng.random(frame.shape) < 0.2
+            frame = np.where(changed, rng.integers(len(GLYPHS), size=frame.shape), frame)
+            self.view.draw(frame, status="status")
+            self.assert_shows(frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
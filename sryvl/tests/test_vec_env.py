@@ -0,0 +1,192 @@
+from sryvl.envs.sryvl_v0 import assets, vec_env
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.kernels import sample_masked
+from sryvl.envs.sryvl_v0.vec_env import SrYvlVecEnv, NO_FOOD
+
+import unittest
+from unittest import mock
+import numpy as np
+
+
+class TestSrYvlVecEnv(unittest.TestCase):
+
+    def setUp(self):
+        self.env = SrYvlVecEnv(num_envs=8, observation_mode="flattened_planes")
+        self.env.reset(seed=0)
+
+    def step_until_done(self, observe=True):
+        for _ in range(1000):
+            obs, rewards, dones, infos = self.env.step(self.env.sample_action(), observe=observe)
+            if dones.any():
+                return obs, rewards, dones, infos
+        self.fail("No row was done after 1000 steps")
+
+    def test_final_observation_per_row(self):
+        obs, rewards, dones, infos = self.step_until_done()
+
+        final = infos["final_observation"]
+        np.testing.assert_array_equal(infos["_final_observation"], dones)
+        self.assertEqual(final.shape, (8,))
+        for i in range(8):
+            if dones[i]:
+                self.assertEqual(final[i].shape, self.env.single_observation_space.shape)
+            else:
+                self.assertIsNone(final[i])
+
+    def test_final_observation_without_observe(self):
+        obs, rewards, dones, infos = self.step_until_done(observe=False)
+        self.assertIsNone(obs)
+        self.assertTrue(all(final is None for final in infos["final_observation"]))
+
+    def test_numpy_and_kernel_paths(self):
+        def rollout():
+            env = SrYvlVecEnv(num_envs=4, world_size=30)
+            env.reset(seed=6)
+            for _ in range(100):
+                obs, rewards, dones, _ = env.step(env.sample_action())
+                yield obs, env.world.copy(), rewards, dones
+
+        # The kernels run as plain python without Numba, enabling them here still takes their code paths.
+        numpy_steps = list(rollout())
+        with mock.patch.object(vec_env, "NUMBA_ENABLED", True), mock.patch.object(assets, "NUMBA_ENABLED", True):
+            kernel_steps = list(rollout())
+        for numpy_step, kernel_step in zip(numpy_steps, kernel_steps):
+            for expected, value in zip(numpy_step, kernel_step):
+                np.testing.assert_array_equal(value, expected)
+
+
+class TestFrameSkip(unittest.TestCase):
+
+    def test_done_row_stops_at_its_last_frame(self):
+        params = dict(num_envs=4, world_size=20, observation_mode="flattened_planes")
+        env = SrYvlVecEnv(frame_skip=4, **params)
+        env.reset(seed=1)
+        single = SrYvlVecEnv(**params)
+        single.reset(seed=1)
+        rng = np.random.default_rng(0)
+
+        for _ in range(200):
+            actions = sample_masked(env.legal_actions, rng.random(env.num_envs))
+            obs, rewards, dones, infos = env.step(actions)
+            for _ in range(4):
+                single_obs, single_rewards, single_dones, single_infos = single.step(actions)
+                if single_dones.any():
+                    break
+            if not dones.any():
+                # Until a row is done, a step is 4 steps of the same actions, with the rewards summed.
+                self.assertFalse(single_dones.any())
+                np.testing.assert_array_equal(rewards, 0)
+                np.testing.assert_array_equal(obs, single_obs)
+                np.testing.assert_array_equal(env.world, single.world)
+                continue
+
+            # The rows that are done first stopped at their last frame: the frames after it left them as they were.
+            # The other rows go on with different draws from then on.
+            first = single_dones.nonzero()[0]
+            self.assertTrue(dones[first].all())
+            np.testing.assert_array_equal(rewards[first], -1)
+            for i in first:
+                np.testing.assert_array_equal(infos["final_observation"][i], single_infos["final_observation"][i])
+            return
+        self.fail("No row was done after 200 steps")
+
+
+class TestRowParams(unittest.TestCase):
+
+    def setUp(self):
+        # Without food growth and within the first steps, no draw of the env depends on the agents' sizes.
+        params = dict(num_envs=4, world_size=20, food_growth_density=0, observation_mode="flattened_planes")
+        self.env = SrYvlVecEnv(**params)
+        self.env.reset(seed=0)
+        self.varied = SrYvlVecEnv(**params)
+        self.varied.reset(seed=0)
+
+    def test_only_the_given_rows_change(self):
+        self.varied.set_row_params([1, 2], shrink_rate_min=[0.02, 0.03], shrink_rate_max=0.03)
+        np.testing.assert_array_equal(self.varied.shrink_rate_min, [0.009, 0.02, 0.03, 0.009])
+        np.testing.assert_array_equal(self.varied.shrink_rate_max, [0.01, 0.03, 0.03, 0.01])
+
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            actions = sample_masked(self.env.legal_actions, rng.random(self.env.num_envs))
+            obs = self.env.step(actions)[0]
+            varied_obs = self.varied.step(actions)[0]
+            np.testing.assert_array_equal(varied_obs[[0, 3]], obs[[0, 3]])
+            np.testing.assert_array_equal(self.varied.world[[0, 3]], self.env.world[[0, 3]])
+            np.testing.assert_array_equal(self.varied.agent_size[[0, 3]], self.env.agent_size[[0, 3]])
+            self.assertTrue((self.varied.agent_size[[1, 2]] < self.env.agent_size[[1, 2]]).all())
+
+    def test_rejected_names_change_nothing(self):
+        with self.assertRaisesRegex(AssertionError, "max_agent_size is not one of the per-row parameters"):
+            self.varied.set_row_params([0], growth_rate_min=0.5, max_agent_size=3)
+        np.testing.assert_array_equal(self.varied.growth_rate_min, self.env.growth_rate_min)
+
+
+class TestOutputBuffers(unittest.TestCase):
+
+    def test_render_modes(self):
+        configs = [
+            dict(observation_mode="rgb_array"),
+            dict(observation_mode="flattened_planes"),
+            dict(observation_mode="flattened_planes", plane_dtype=np.uint8),
+            dict(observation_mode="symbolic", cell_pixels=2),
+        ]
+        for config in configs:
+            with self.subTest(**config):
+                env = SrYvlVecEnv(num_envs=4, world_size=20, **config)
+                env.reset(seed=0)
+                shape = (env.num_envs, *env.single_observation_space.shape)
+                for _ in range(30):
+                    out = np.full(shape, 7, dtype=env.single_observation_space.dtype)
+                    obs = env.step(env.sample_action(), out=out)[0]
+                    self.assertTrue(np.shares_memory(obs, out))
+                    np.testing.assert_array_equal(obs, env.observe())
+                out = np.full(shape, 7, dtype=env.single_observation_space.dtype)
+                self.assertTrue(np.shares_memory(env.observe(out=out), out))
+                np.testing.assert_array_equal(out, env.observe())
+
+
+class TestVecMatchesSingleAgent(unittest.TestCase):
+    """Without food growth, the only random draws after a reset, a row of the vec env steps like SrYvlLvl0Env."""
+
+    def setUp(self):
+        params = dict(world_size=20, food_growth_density=0, food_expiry_period=30)
+        self.env = SrYvlLvl0Env(observation_mode="flattened_planes", **params)
+        self.env.reset(seed=4)
+        self.vec = SrYvlVecEnv(num_envs=2, observation_mode="flattened_planes", **params)
+        self.vec.reset(seed=4)
+        self.copy_world(self.env, self.vec)
+
+    @staticmethod
+    def copy_world(env, vec):
+        vec.static[0] = env.static
+        vec.terrain[0] = env._terrain_map
+        vec.food_age[0] = NO_FOOD
+        vec.food_poison[0] = False
+        slots = env.foods.live_slots()
+        ys, xs = env.foods.positions[slots].T
+        vec.food_age[0, ys, xs] = env.foods.age[slots]
+        vec.food_poison[0, ys, xs] = env.foods.is_poison[slots]
+        vec.agent_position[0] = env.agent_position
+        vec._clear_history([0])
+        vec.draw_env()
+        vec.legal_actions = vec._find_legal_actions()
+
+    def test_steps(self):
+        n_steps = 0
+        while not self.env.done:
+            np.testing.assert_array_equal(self.vec.legal_actions[0], self.env.legal_actions)
+            action = self.env.sample_action()
+            obs, reward, done, _ = self.env.step(action)
+            vec_obs, rewards, dones, _ = self.vec.step([action, self.vec.sample_action()[1]])
+            self.assertEqual((rewards[0], dones[0]), (reward, done))
+            if not done:
+                np.testing.assert_array_equal(self.vec.world[0], self.env.world)
+                self.assertAlmostEqual(self.vec.agent_size[0], self.env.agent_size)
+                np.testing.assert_array_equal(vec_obs[0], obs)
+            n_steps += 1
+        self.assertGreater(n_steps, 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from sryvl.envs.sryvl_v0.env import SrYvlLvl0Env
+from sryvl.envs.sryvl_v0.vec_env import SrYvlVecEnv, NO_FOOD
+from sryvl.envs.sryvl_v0.generate_world_bank import generate_world_bank
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+
+class TestWorldBank(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.bank = generate_world_bank(self.path, 5, seed=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_load_matches_generated_world(self):
+        generated = SrYvlLvl0Env()
+        generated.reset(seed=0)
+
+        loaded = SrYvlLvl0Env(world_bank=self.bank)
+        loaded._load_world(*self.bank.get(0))
+        loaded.draw_env()
+
+        np.testing.assert_array_equal(loaded.world, generated.world)
+        np.testing.assert_array_equal(loaded._terrain_map, generated._terrain_map)
+        for a, b in zip(loaded.foods.get_state(), generated.foods.get_state()):
+            np.testing.assert_array_equal(a, b)
+
+    def test_batch_matches_single_worlds(self):
+        indices = np.array([3, 0, 3])
+        static, terrain, food_rows, positions, poison, age = self.bank.get_batch(indices)
+        for row, index in enumerate(indices):
+            expected = self.bank.get(index)
+            np.testing.assert_array_equal(static[row], expected[0])
+            np.testing.assert_array_equal(terrain[row], expected[1])
+            np.testing.assert_array_equal(positions[food_rows == row], expected[2])
+            np.testing.assert_array_equal(poison[food_rows == row], expected[3])
+            np.testing.assert_array_equal(age[food_rows == row], expected[4])
+
+    def test_vec_env_loads_only_the_bank_foods(self):
+        env = SrYvlVecEnv(num_envs=4, world_bank=self.bank, observation_mode="flattened_planes")
+        env.reset(seed=0)
+        n_foods = np.diff(self.bank.food_offsets)
+        self.assertTrue(set((env.food_age != NO_FOOD).sum(axis=(1, 2))) <= set(n_foods))
+        self.assertTrue((env.food_age < env.food_expiry_period).all())
+
+    def test_row_params_the_bank_cannot_serve(self):
+        env = SrYvlVecEnv(num_envs=4, world_bank=self.bank)
+        with self.assertRaises(AssertionError):
+            env.set_row_params([1], terrain_intensity=0.5, growth_rate_min=0.01)
+        np.testing.assert_array_equal(env.terrain_intensity, self.bank.meta["terrain_intensity"])
+        np.testing.assert_array_equal(env.growth_rate_min, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()